@@ -3,7 +3,8 @@
 """Analyze Claude Code session JSONL files to understand content breakdown."""
 
 import sys
-import json
+
+from session_jsonl import iter_records
 
 def analyze_session(filepath):
     user_text = 0
@@ -11,33 +12,32 @@ def analyze_session(filepath):
     assistant_text = 0
     assistant_tool_calls = 0
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                d = json.loads(line)
-                if d.get('type') == 'user':
-                    content = d.get('message', {}).get('content', '')
-                    if isinstance(content, str):
-                        user_text += len(content)
-                    elif isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict):
-                                if item.get('type') == 'tool_result':
-                                    user_tool_results += len(str(item))
-                                elif item.get('type') == 'text':
-                                    user_text += len(item.get('text', ''))
-                            else:
-                                user_text += len(str(item))
-                elif d.get('type') == 'assistant':
-                    content = d.get('message', {}).get('content', [])
+    # Other record types are skipped on a byte prefilter without decoding
+    for d in iter_records(filepath, ('user', 'assistant')):
+        try:
+            if d.get('type') == 'user':
+                content = d.get('message', {}).get('content', '')
+                if isinstance(content, str):
+                    user_text += len(content)
+                elif isinstance(content, list):
                     for item in content:
                         if isinstance(item, dict):
-                            if item.get('type') == 'tool_use':
-                                assistant_tool_calls += len(str(item))
+                            if item.get('type') == 'tool_result':
+                                user_tool_results += len(str(item))
                             elif item.get('type') == 'text':
-                                assistant_text += len(item.get('text', ''))
-            except Exception as e:
-                pass
+                                user_text += len(item.get('text', ''))
+                        else:
+                            user_text += len(str(item))
+            elif d.get('type') == 'assistant':
+                content = d.get('message', {}).get('content', [])
+                for item in content:
+                    if isinstance(item, dict):
+                        if item.get('type') == 'tool_use':
+                            assistant_tool_calls += len(str(item))
+                        elif item.get('type') == 'text':
+                            assistant_text += len(item.get('text', ''))
+        except Exception as e:
+            pass
 
     print('=== CONTENT BREAKDOWN ===')
     print(f'User actual text:      {user_text/1024:.1f} KB')
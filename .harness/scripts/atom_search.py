@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Full-text search over the Harness atom store.
+
+Used by query-atoms.py (--search) and refreshed by extract-atoms.py. Atom
+text and keywords are indexed in an SQLite FTS5 table in
+.harness/cache/atoms.fts.sqlite, using only the standard-library sqlite3.
+Rows are keyed by each atom's virtual store offset, which the postings
+index in atom_store.py maps to its atom numbers, so search results combine
+with its filters.
+
+Like the other atom indexes the database is derived from the store: it
+catches up on appended lines and is rebuilt if a segment was rewritten, so
+deleting it is always safe.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from atom_segments import catch_up, covers
+from atom_store import atom_text
+
+# Bump when the table layout or indexed text changes
+SEARCH_VERSION = 2
+
+SNIPPET_TOKENS = 16
+
+# Offsets per snippet query, well under SQLite's limit on bound variables
+SNIPPET_BATCH = 500
+
+# Rows inserted per executemany() while catching up
+INSERT_BATCH = 1000
+
+
+class SearchUnavailable(Exception):
+    """Raised when the sqlite3 module was built without FTS5."""
+
+
+def get_search_db_path(cache_dir):
+    """Get path to the full-text search database."""
+    return Path(cache_dir) / 'atoms.fts.sqlite'
+
+
+def _create_schema(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS atoms_fts USING fts5(body, keywords)")
+    except sqlite3.OperationalError as e:
+        raise SearchUnavailable(f"SQLite FTS5 is not available ({e})")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+
+
+def _read_meta(conn):
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def _searchable_text(atom):
+    """(body, keywords) text indexed for one atom."""
+    return atom_text(atom), ' '.join(atom.get('keywords') or [])
+
+
+def refresh_search_index(manifest, db_path):
+    """Open the search database, catching up on store lines added since it was updated."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    meta = _read_meta(conn)
+    covered = [tuple(entry) for entry in json.loads(meta.get('covered', '[]'))]
+    if meta.get('version') != SEARCH_VERSION or not covers(covered, manifest):
+        # Stale or not ours - start again from an empty database
+        conn.close()
+        db_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(db_path)
+        covered = None
+
+    _create_schema(conn)
+
+    rows = []
+
+    def insert_rows():
+        conn.executemany("INSERT INTO atoms_fts (rowid, body, keywords) VALUES (?, ?, ?)", rows)
+        rows.clear()
+
+    def add(offset, line):
+        try:
+            atom = json.loads(line)
+        except ValueError:
+            return
+        if isinstance(atom, dict):
+            rows.append((offset, *_searchable_text(atom)))
+            if len(rows) >= INSERT_BATCH:
+                insert_rows()
+
+    # One transaction, so an interrupted refresh leaves the previous state
+    with conn:
+        new_covered = catch_up(manifest, covered or [], add)
+        insert_rows()
+        if new_covered == covered:
+            return conn  # Already current
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ('version', SEARCH_VERSION),
+            ('covered', json.dumps(new_covered)),
+        ])
+    return conn
+
+
+def search_atoms(conn, query, limit=None, offset=0):
+    """Iterate store offsets of atoms matching an FTS5 query, best match (lowest bm25) first.
+
+    The query uses FTS5 syntax: words are ANDed, "quoted text" is a phrase,
+    word* is a prefix, and OR / NOT combine terms. limit and offset page
+    through the matches in SQL; otherwise rows are only read as far as the
+    caller iterates. Raises ValueError on a malformed query.
+    """
+    try:
+        cursor = conn.execute(
+            "SELECT rowid FROM atoms_fts WHERE atoms_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            (query, -1 if limit is None else limit, offset)
+        )
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"Invalid search '{query}': {e} (quote words containing punctuation)")
+    return (row[0] for row in cursor)
+
+
+def count_matches(conn, query):
+    """Number of atoms matching an FTS5 query (see search_atoms)."""
+    try:
+        return conn.execute("SELECT count(*) FROM atoms_fts WHERE atoms_fts MATCH ?", (query,)).fetchone()[0]
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"Invalid search '{query}': {e} (quote words containing punctuation)")
+
+
+def search_snippets(conn, query, offsets):
+    """Return {store offset: snippet of its best-matching column, matches marked} for offsets."""
+    snippets = {}
+    for i in range(0, len(offsets), SNIPPET_BATCH):
+        batch = offsets[i:i + SNIPPET_BATCH]
+        placeholders = ','.join('?' * len(batch))
+        snippets.update(conn.execute(
+            f"SELECT rowid, snippet(atoms_fts, -1, '**', '**', '...', {SNIPPET_TOKENS}) "
+            f"FROM atoms_fts WHERE atoms_fts MATCH ? AND rowid IN ({placeholders})",
+            (query, *batch)
+        ))
+    return snippets
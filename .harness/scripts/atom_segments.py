@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segmented storage for the Harness atom store.
+
+Atoms live in segment files listed, in order, in .harness/atoms/manifest.json.
+A segment holds one month of sessions (by the date in the session id) and
+the manifest records its atom count, timestamp range, sessions, size and -
+once sealed - a sha256 checksum. New atoms are appended to their month's
+open segment. Segments are sealed once their month is over and no atoms
+have been added for a grace period (so a month's late transcripts can
+still be reprocessed), or when they pass SEGMENT_MAX_BYTES, optionally
+block-compressing them. Sealed segments are never written again: atoms
+arriving late for a sealed month start a new segment.
+
+The pre-segment store, .harness/atoms.jsonl, is adopted unchanged as sealed
+segment 0.
+
+Atoms are addressed by a virtual offset: the segment's position in the
+manifest in the high bits and the byte offset within the (uncompressed)
+segment in the low bits. Segments are only ever added to the end of the
+manifest, so virtual offsets stay valid as segments grow; a segment's
+generation changes when it is rewritten, which tells indexes to rebuild.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+# Open segments past this size are sealed at the end of a run
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+# Days without new atoms before a past month's segment is sealed
+SEAL_GRACE_DAYS = 7
+
+OFFSET_BITS = 40
+_OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+# Block-compressed segments: zlib blocks of whole lines, then a table of
+# (uncompressed start, compressed start) per block and a footer
+COMPRESSED_BLOCK_BYTES = 64 * 1024
+_BLOCK_MAGIC = b'HAZB'
+_BLOCK_ENTRY = struct.Struct('<QQ')
+_BLOCK_FOOTER = struct.Struct('<I4s')
+
+_SESSION_DATE = re.compile(r'(\d{4})(\d{2})\d{2}-\d{6}')
+
+
+def get_atom_store_dir(project_root=None):
+    """Get the segmented atom store directory."""
+    return Path(project_root or '.') / '.harness' / 'atoms'
+
+
+def get_legacy_store_path(project_root=None):
+    """Get path to the single-file store that predates segments."""
+    return Path(project_root or '.') / '.harness' / 'atoms.jsonl'
+
+
+def get_manifest_path(store_dir):
+    """Get path to a store's segment manifest."""
+    return Path(store_dir) / 'manifest.json'
+
+
+def virtual_offset(ordinal, offset):
+    """Address of byte offset within the segment at position ordinal in the manifest."""
+    return (ordinal << OFFSET_BITS) | offset
+
+
+def split_offset(voffset):
+    """(segment ordinal, byte offset) for a virtual offset."""
+    return voffset >> OFFSET_BITS, voffset & _OFFSET_MASK
+
+
+def atom_month(atom):
+    """Month ('YYYY-MM') whose segment an atom belongs in: its session's date."""
+    match = _SESSION_DATE.search(atom.get('session_id') or '')
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    return str(atom.get('timestamp') or '')[:7] or 'unknown'
+
+
+def timestamp_epoch(timestamp):
+    """ISO timestamp as epoch seconds (0.0 if missing or unparseable)."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def segment_path(manifest, entry):
+    """Path of a segment's file."""
+    return Path(os.path.normpath(manifest['dir'] / entry['file']))
+
+
+def _new_entry(file_name, month):
+    return {
+        'file': file_name,
+        'month': month,
+        'generation': 0,
+        'sealed': False,
+        'compressed': False,
+        'count': 0,
+        'bytes': 0,
+        'first': None,
+        'last': None,
+        'sessions': [],
+        'sha256': None,
+    }
+
+
+def record_atom(entry, atom, end):
+    """Update a segment's stats for an atom whose line ends at byte offset end."""
+    entry['count'] += 1
+    entry['bytes'] = max(entry['bytes'], end)
+    timestamp = atom.get('timestamp')
+    if timestamp:
+        if entry['first'] is None or timestamp < entry['first']:
+            entry['first'] = timestamp
+        if entry['last'] is None or timestamp > entry['last']:
+            entry['last'] = timestamp
+    session_id = atom.get('session_id')
+    if session_id:
+        i = bisect.bisect_left(entry['sessions'], session_id)
+        if i == len(entry['sessions']) or entry['sessions'][i] != session_id:
+            entry['sessions'].insert(i, session_id)
+
+
+def _refresh_stats(manifest, entry):
+    """Recompute a segment's stats from its file. Returns the end of its last complete line."""
+    entry.update(count=0, bytes=0, first=None, last=None, sessions=[])
+    end = 0
+    for offset, line in iter_segment_lines(manifest, entry):
+        end = offset + len(line)
+        try:
+            atom = json.loads(line)
+        except ValueError:
+            atom = None
+        if isinstance(atom, dict):
+            record_atom(entry, atom, end)
+        entry['bytes'] = end
+    return end
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(store_dir, legacy_path=None):
+    """Load a store's manifest.
+
+    Without a manifest, a legacy single-file store is adopted as sealed
+    segment 0 (in memory until save_manifest()).
+    """
+    store_dir = Path(store_dir)
+    manifest_path = get_manifest_path(store_dir)
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['dir'] = store_dir
+        return manifest
+
+    manifest = {'version': MANIFEST_VERSION, 'segments': [], 'dir': store_dir}
+    legacy_path = Path(legacy_path) if legacy_path else store_dir.parent / 'atoms.jsonl'
+    if legacy_path.exists() and legacy_path.stat().st_size:
+        entry = _new_entry(os.path.relpath(legacy_path, store_dir), 'legacy')
+        _refresh_stats(manifest, entry)
+        entry['sealed'] = True
+        entry['sha256'] = _file_sha256(legacy_path)
+        manifest['segments'].append(entry)
+    return manifest
+
+
+def save_manifest(manifest):
+    """Write the manifest atomically, one segment per line so diffs stay readable."""
+    entries = [json.dumps(entry) for entry in manifest['segments']]
+    text = '{\n  "version": %d,\n  "segments": [%s\n  ]\n}\n' % (
+        MANIFEST_VERSION,
+        ','.join(f"\n    {entry}" for entry in entries),
+    )
+    manifest_path = get_manifest_path(manifest['dir'])
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, manifest_path)
+
+
+def segment_size(manifest, entry):
+    """Uncompressed size of a segment in bytes."""
+    if entry.get('compressed'):
+        return entry['bytes']
+    try:
+        return os.path.getsize(segment_path(manifest, entry))
+    except OSError:
+        return 0
+
+
+def _read_block_table(f):
+    """Return ([uncompressed starts], [compressed starts + table position]) of a compressed segment."""
+    f.seek(-_BLOCK_FOOTER.size, os.SEEK_END)
+    count, magic = _BLOCK_FOOTER.unpack(f.read(_BLOCK_FOOTER.size))
+    if magic != _BLOCK_MAGIC:
+        raise ValueError(f"{f.name} is not a compressed atom segment")
+    table_size = count * _BLOCK_ENTRY.size
+    table_pos = f.seek(-(_BLOCK_FOOTER.size + table_size), os.SEEK_END)
+    table = f.read(table_size)
+    entries = [_BLOCK_ENTRY.unpack_from(table, i * _BLOCK_ENTRY.size) for i in range(count)]
+    return [u for u, _ in entries], [c for _, c in entries] + [table_pos]
+
+
+def iter_segment_lines(manifest, entry, start=0):
+    """Yield (offset, line) for each complete line of a segment from byte offset start."""
+    path = segment_path(manifest, entry)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        if entry.get('compressed'):
+            starts, cstarts = _read_block_table(f)
+            first = max(bisect.bisect_right(starts, start) - 1, 0)
+            for i in range(first, len(starts)):
+                f.seek(cstarts[i])
+                block = zlib.decompress(f.read(cstarts[i + 1] - cstarts[i]))
+                offset = starts[i]
+                for line in block.splitlines(keepends=True):
+                    if offset >= start:
+                        yield offset, line
+                    offset += len(line)
+            return
+
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b'\n'):
+                return  # Partly written line - picked up next time
+            yield offset, line
+            offset += len(line)
+
+
+def store_coverage(manifest):
+    """[(generation, size)] per segment: what an index built from the store now would cover."""
+    return [(entry['generation'], segment_size(manifest, entry)) for entry in manifest['segments']]
+
+
+def covers(covered, manifest):
+    """True if every segment an index covered is unchanged apart from appends."""
+    segments = manifest['segments']
+    if len(covered) > len(segments):
+        return False
+    return all(
+        generation == entry['generation'] and size <= segment_size(manifest, entry)
+        for (generation, size), entry in zip(covered, segments)
+    )
+
+
+def catch_up(manifest, covered, add):
+    """Call add(voffset, line) for each complete line past covered; return the new coverage."""
+    coverage = []
+    for ordinal, entry in enumerate(manifest['segments']):
+        end = covered[ordinal][1] if ordinal < len(covered) else 0
+        for offset, line in iter_segment_lines(manifest, entry, end):
+            add(virtual_offset(ordinal, offset), line)
+            end = offset + len(line)
+        coverage.append((entry['generation'], end))
+    return coverage
+
+
+class _PlainSegment:
+    """Line reads from an uncompressed segment through mmap, remapped as it grows."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = None
+
+    def read_line(self, offset):
+        if self._map is None or offset >= len(self._map):
+            size = os.fstat(self._file.fileno()).st_size
+            if offset >= size:
+                return b''
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        end = self._map.find(b'\n', offset)
+        return self._map[offset:end if end != -1 else len(self._map)]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class _CompressedSegment:
+    """Line reads from a block-compressed segment, decompressing one block at a time."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._starts, self._cstarts = _read_block_table(self._file)
+        self._cached = (None, b'')
+
+    def read_line(self, offset):
+        i = bisect.bisect_right(self._starts, offset) - 1
+        if i < 0:
+            return b''
+        if self._cached[0] != i:
+            self._file.seek(self._cstarts[i])
+            self._cached = (i, zlib.decompress(self._file.read(self._cstarts[i + 1] - self._cstarts[i])))
+        block = self._cached[1]
+        start = offset - self._starts[i]
+        end = block.find(b'\n', start)
+        return block[start:end if end != -1 else len(block)]
+
+    def close(self):
+        self._file.close()
+
+
+class StoreReader:
+    """Random access to store lines by virtual offset. Use as a context manager."""
+
+    def __init__(self, manifest):
+        self._manifest = manifest
+        self._segments = {}
+
+    def read_line(self, voffset):
+        """The line (without newline) at voffset, or b'' if there is none."""
+        ordinal, offset = split_offset(voffset)
+        if ordinal not in self._segments:
+            self._segments[ordinal] = None
+            if ordinal < len(self._manifest['segments']):
+                entry = self._manifest['segments'][ordinal]
+                path = segment_path(self._manifest, entry)
+                try:
+                    self._segments[ordinal] = (_CompressedSegment if entry.get('compressed') else _PlainSegment)(path)
+                except FileNotFoundError:
+                    pass
+        segment = self._segments[ordinal]
+        return segment.read_line(offset) if segment else b''
+
+    def close(self):
+        for segment in self._segments.values():
+            if segment:
+                segment.close()
+        self._segments.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_segment(manifest, month):
+    """Return (ordinal, entry) of the open segment for month, adding one if there is none."""
+    segments = manifest['segments']
+    for ordinal in reversed(range(len(segments))):
+        entry = segments[ordinal]
+        if entry['month'] == month and not entry['sealed']:
+            return ordinal, entry
+
+    seq = sum(1 for entry in segments if entry['month'] == month)
+    entry = _new_entry(f"atoms-{month}.jsonl" if seq == 0 else f"atoms-{month}.{seq}.jsonl", month)
+    # A leftover file from an interrupted run was never in the manifest
+    path = segment_path(manifest, entry)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    segments.append(entry)
+    return len(segments) - 1, entry
+
+
+def rewrite_segment(manifest, entry, keep):
+    """Rewrite an open segment keeping only records for which keep(record) is true.
+
+    Returns how many lines were dropped; the file is untouched if none were.
+    """
+    if entry['sealed']:
+        raise ValueError(f"Segment {entry['file']} is sealed")
+
+    kept = []
+    dropped = 0
+    for _, line in iter_segment_lines(manifest, entry):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict) and not keep(record):
+            dropped += 1
+        else:
+            kept.append(line)
+    if not dropped:
+        return 0
+
+    path = segment_path(manifest, entry)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.writelines(kept)
+    os.replace(tmp_path, path)
+    entry['generation'] += 1
+    _refresh_stats(manifest, entry)
+    return dropped
+
+
+def _compress_segment(path, compressed_path):
+    """Write a block-compressed copy of an uncompressed segment."""
+    table = []
+    tmp_path = compressed_path.with_name(f"{compressed_path.name}.{os.getpid()}.tmp")
+    with open(path, 'rb') as f, open(tmp_path, 'wb') as out:
+        out.write(_BLOCK_MAGIC)
+        block = []
+        block_size = 0
+        start = 0
+        for line in f:
+            if block and block_size + len(line) > COMPRESSED_BLOCK_BYTES:
+                table.append((start, out.tell()))
+                out.write(zlib.compress(b''.join(block), 6))
+                start += block_size
+                block = []
+                block_size = 0
+            block.append(line)
+            block_size += len(line)
+        if block:
+            table.append((start, out.tell()))
+            out.write(zlib.compress(b''.join(block), 6))
+        for entry in table:
+            out.write(_BLOCK_ENTRY.pack(*entry))
+        out.write(_BLOCK_FOOTER.pack(len(table), _BLOCK_MAGIC))
+    os.replace(tmp_path, compressed_path)
+
+
+def seal_segment(manifest, entry, compress=False):
+    """Seal an open segment: final stats and checksum, optionally block-compressed."""
+    path = segment_path(manifest, entry)
+    end = _refresh_stats(manifest, entry)
+    if path.exists() and path.stat().st_size > end:
+        with open(path, 'r+b') as f:
+            f.truncate(end)  # Drop a partly written last line
+
+    if compress and path.exists():
+        compressed_path = path.with_name(path.name + 'z')
+        _compress_segment(path, compressed_path)
+        path.unlink()
+        entry['file'] = os.path.relpath(compressed_path, manifest['dir'])
+        entry['compressed'] = True
+        path = compressed_path
+
+    entry['sha256'] = _file_sha256(path) if path.exists() else None
+    entry['sealed'] = True
+
+
+def seal_segments(manifest, compress=False, now=None, grace_days=SEAL_GRACE_DAYS):
+    """Seal open segments that are done or passed SEGMENT_MAX_BYTES; returns them.
+
+    A segment is done when its month is over and its newest atom is at
+    least grace_days old - atoms are stamped when they are extracted, so
+    a segment created for a past month stays open for reprocessing.
+    """
+    now = now or datetime.now()
+    current_month = now.strftime('%Y-%m')
+    cutoff = (now - timedelta(days=grace_days)).timestamp()
+    sealed = []
+    for entry in manifest['segments']:
+        if entry['sealed']:
+            continue
+        done = entry['month'] < current_month and timestamp_epoch(entry['last']) <= cutoff
+        if done or segment_size(manifest, entry) >= SEGMENT_MAX_BYTES:
+            seal_segment(manifest, entry, compress)
+            sealed.append(entry)
+    return sealed
+
+
+def segment_overlaps(entry, since=None, until=None):
+    """False if a sealed segment's atoms all fall outside [since, until) (epoch seconds).
+
+    Open segments always overlap.
+    """
+    if not entry['sealed']:
+        return True  # Stats may lag behind appends
+    if entry['first'] is None:
+        return False  # Empty
+    if since is not None and timestamp_epoch(entry['last']) < since:
+        return False
+    if until is not None and timestamp_epoch(entry['first']) >= until:
+        return False
+    return True
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Atom identity and indexes for the Harness atom store (see atom_segments.py).
+
+Used by extract-atoms.py and query-atoms.py. Atom ids are derived from the
+session id, the message's position in its transcript and a hash of its
+content, so the same message always gets the same id and re-extracting it
+is detected.
+
+Atoms are stored compactly: each message's text is kept once, as "text"
+(up to TEXT_CHARS) and a "truncated" flag, and context_before/after list
+neighbouring messages as {"ref": atom id} when the neighbour is itself an
+atom, or as its opening CONTEXT_CHARS inline otherwise. expand_atom()
+rebuilds the original record shape (content, content_full and joined
+context strings); lines written before the compact format are already in
+that shape and pass through unchanged.
+
+The id index is a binary open-addressing hash table mapping a 64-bit hash
+of each id to the virtual offset of its line in the store. It lives in
+.harness/cache/atoms.idx, is derived entirely from the store, and catches
+up on lines appended to each segment since it was saved (or rebuilds if a
+segment was rewritten), so it never has to be committed. A slot only says
+where to look: lookups confirm the id on the line itself.
+
+The postings index backs query-atoms.py. It numbers atoms in the order
+they were indexed, keeps their virtual offsets and timestamps in arrays,
+and maps each primary_type, types, keywords and session_id value to a
+postings list of atom numbers, plus one list per segment so a time range
+only looks at the segments that can hold it. It lives next to the id index as packed
+arrays behind a sorted term table, and is kept current the same way.
+Queries map the file and binary-search the table, so they only read the
+postings lists they use.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from pathlib import Path
+
+from atom_segments import (
+    StoreReader, atom_month, catch_up, covers, open_segment, record_atom, segment_path,
+    split_offset, store_coverage, timestamp_epoch, virtual_offset,
+)
+
+ATOM_ID_CHARS = 16
+
+# Record shape limits - expanded atoms match what extract-atoms.py used to store
+CONTENT_CHARS = 1000
+TEXT_CHARS = 2000
+CONTEXT_CHARS = 500
+TRUNCATED_MARK = '...[truncated]'
+
+INDEX_MAGIC = b'HAIX'
+INDEX_VERSION = 2
+INDEX_MIN_CAPACITY = 1024
+
+# magic, version, capacity, count, number of segments covered
+_HEADER = struct.Struct('<4sIIII')
+# per covered segment: generation, bytes indexed
+_COVERED = struct.Struct('<IQ')
+# id key, virtual line offset + 1 (0 marks an empty slot)
+_SLOT = struct.Struct('<QQ')
+
+_ID_PREFIX = re.compile(rb'^\{"id": "([^"\\]*)"')
+
+POSTINGS_MAGIC = b'HAPX'
+# Bump when the postings index layout changes
+POSTINGS_VERSION = 4
+POSTING_FIELDS = ('primary_type', 'types', 'keywords', 'session_id')
+# Postings "field" listing each segment's atoms, by ordinal
+SEGMENT_FIELD = 'segment'
+
+# magic, version, atoms, terms, number of segments covered, bytes of term keys
+_POSTINGS_HEADER = struct.Struct('<4sIIIIQ')
+# per term, sorted by key: key start, key length, first posting, number of postings
+_TERM = struct.Struct('<IIQQ')
+
+
+def make_atom_id(session_id, position, content):
+    """Deterministic atom id from session id, message position and content."""
+    content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    identity = f"{session_id}:{position}:{content_hash}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:ATOM_ID_CHARS]
+
+
+def context_refs(messages, session_id, atom_ids):
+    """Compact context for neighbouring messages: atom refs where possible, else opening text."""
+    refs = []
+    for message in messages:
+        content = message['content']
+        if not content:
+            continue
+        atom_id = make_atom_id(session_id, message['position'], content)
+        refs.append({'ref': atom_id} if atom_id in atom_ids else content[:CONTEXT_CHARS])
+    return refs
+
+
+def _join_context(refs, resolve):
+    pieces = []
+    for item in refs or []:
+        if isinstance(item, dict):
+            item = resolve(item['ref'])
+            if item is None:
+                continue  # Unresolvable ref - leave the piece out
+        pieces.append(item[:CONTEXT_CHARS])
+    return '\n\n'.join(pieces) if pieces else None
+
+
+def expand_atom(record, resolve):
+    """Rebuild the full atom shape from a stored record.
+
+    resolve(atom_id) returns another atom's text (or None), for context refs.
+    Records already in full shape are returned as they are.
+    """
+    if 'text' not in record:
+        return record
+    text = record['text']
+    return {
+        'id': record['id'],
+        'session_id': record['session_id'],
+        'timestamp': record['timestamp'],
+        'source': record['source'],
+        'types': record['types'],
+        'primary_type': record['primary_type'],
+        'confidence': record['confidence'],
+        'keywords': record['keywords'],
+        'content': text[:CONTENT_CHARS],
+        'content_full': text + TRUNCATED_MARK if record.get('truncated') else text,
+        'context_before': _join_context(record.get('context_before'), resolve),
+        'context_after': _join_context(record.get('context_after'), resolve),
+    }
+
+
+def atom_text(record):
+    """A stored record's own text, in either record shape."""
+    if 'text' in record:
+        return record['text']
+    return record.get('content_full') or record.get('content') or ''
+
+
+def atom_key(atom_id):
+    """64-bit index key for an atom id."""
+    return int.from_bytes(hashlib.blake2b(atom_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def get_atom_index_path(cache_dir):
+    """Get path to the atom id index."""
+    return Path(cache_dir) / 'atoms.idx'
+
+
+def get_postings_path(cache_dir):
+    """Get path to the atom postings index."""
+    return Path(cache_dir) / 'atoms.postings'
+
+
+def _new_index(capacity=INDEX_MIN_CAPACITY):
+    return {
+        'capacity': capacity,
+        'count': 0,
+        'covered': [],
+        'slots': bytearray(capacity * _SLOT.size),
+    }
+
+
+def _read_index(index_path):
+    """Read an index file, or None if it is missing or not a valid index."""
+    try:
+        with open(index_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, capacity, count, segments = _HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return None
+    slots_start = _HEADER.size + segments * _COVERED.size
+    slots = bytearray(data[slots_start:])
+    if len(slots) != capacity * _SLOT.size or capacity & (capacity - 1):
+        return None
+    covered = [_COVERED.unpack_from(data, _HEADER.size + i * _COVERED.size) for i in range(segments)]
+    return {
+        'capacity': capacity,
+        'count': count,
+        'covered': covered,
+        'slots': slots,
+    }
+
+
+def read_atom_id(line):
+    """Return the id of a raw store line (bytes), or None if it has none."""
+    match = _ID_PREFIX.match(line)
+    if match:
+        return match.group(1).decode('utf-8')
+    try:
+        atom = json.loads(line)
+    except ValueError:
+        return None
+    return atom.get('id') if isinstance(atom, dict) else None
+
+
+def _insert(index, key, offset):
+    """Place (key, offset) in the table without checking the load factor."""
+    slots = index['slots']
+    mask = index['capacity'] - 1
+    i = key & mask
+    while True:
+        slot_key, slot_offset = _SLOT.unpack_from(slots, i * _SLOT.size)
+        if slot_offset == 0:
+            _SLOT.pack_into(slots, i * _SLOT.size, key, offset + 1)
+            index['count'] += 1
+            return
+        if slot_key == key and slot_offset == offset + 1:
+            return  # Already indexed
+        i = (i + 1) & mask
+
+
+def _grow(index):
+    """Double the table and re-insert every entry."""
+    old_slots = index['slots']
+    grown = _new_index(index['capacity'] * 2)
+    for i in range(index['capacity']):
+        key, offset = _SLOT.unpack_from(old_slots, i * _SLOT.size)
+        if offset:
+            _insert(grown, key, offset - 1)
+    index.update(capacity=grown['capacity'], count=grown['count'], slots=grown['slots'])
+
+
+def add_atom_offset(index, atom_id, offset):
+    """Record that the atom with atom_id is at a (virtual) store offset."""
+    # Kept at most half full so probe sequences stay short
+    if (index['count'] + 1) * 2 > index['capacity']:
+        _grow(index)
+    _insert(index, atom_key(atom_id), offset)
+
+
+def find_atom_offset(index, atom_id, read_line):
+    """Return the store offset of atom_id, or None. read_line is StoreReader.read_line."""
+    key = atom_key(atom_id)
+    slots = index['slots']
+    mask = index['capacity'] - 1
+    i = key & mask
+    while True:
+        slot_key, slot_offset = _SLOT.unpack_from(slots, i * _SLOT.size)
+        if slot_offset == 0:
+            return None
+        if slot_key == key and read_atom_id(read_line(slot_offset - 1)) == atom_id:
+            return slot_offset - 1
+        i = (i + 1) & mask
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temp file and rename."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_atom_index(manifest, index_path):
+    """Load the id index for a store, catching up on lines appended since it was saved.
+
+    The index is rebuilt from scratch if it is missing, unreadable, or a
+    segment it covered has shrunk or been rewritten since.
+    """
+    index = _read_index(index_path)
+    if index is None or not covers(index['covered'], manifest):
+        index = _new_index()
+
+    def add(offset, line):
+        atom_id = read_atom_id(line)
+        if atom_id:
+            add_atom_offset(index, atom_id, offset)
+
+    index['covered'] = catch_up(manifest, index['covered'], add)
+    return index
+
+
+def save_atom_index(index, index_path):
+    """Write the index atomically, recording how much of each segment it covers."""
+    header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, index['capacity'], index['count'], len(index['covered']))
+    covered = b''.join(_COVERED.pack(*entry) for entry in index['covered'])
+    _write_atomic(index_path, header + covered + index['slots'])
+
+
+def append_atoms(atoms, manifest, index):
+    """Append atoms whose ids aren't in the store yet; returns how many were written.
+
+    Each atom goes to the open segment for its month. Existing lines are
+    never touched, so the store stays append-only.
+    """
+    written = 0
+    outputs = {}
+    try:
+        with StoreReader(manifest) as reader:
+            for atom in atoms:
+                if find_atom_offset(index, atom['id'], reader.read_line) is not None:
+                    continue
+                ordinal, entry = open_segment(manifest, atom_month(atom))
+                out = outputs.get(ordinal)
+                if out is None:
+                    out = outputs[ordinal] = open(segment_path(manifest, entry), 'ab')
+                offset = out.tell()
+                out.write((json.dumps(atom) + '\n').encode('utf-8'))
+                # Flushed so a repeat within the batch is found by the lookup
+                out.flush()
+                record_atom(entry, atom, out.tell())
+                add_atom_offset(index, atom['id'], virtual_offset(ordinal, offset))
+                written += 1
+    finally:
+        for out in outputs.values():
+            out.close()
+    index['covered'] = store_coverage(manifest)
+    return written
+
+
+def atom_time(atom):
+    """Atom timestamp as epoch seconds (0.0 if missing or unparseable)."""
+    return timestamp_epoch(atom.get('timestamp'))
+
+
+def posting_values(atom, field):
+    """Normalised index values of one atom field - lowercased, without repeats."""
+    value = atom.get(field)
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    return {str(v).lower() for v in value if v is not None}
+
+
+def _posting_keys(atom, ordinal):
+    """Term keys of an atom: "<field>\\0<value>" for each of its field values, and its segment."""
+    keys = [
+        f"{field}\0{value}".encode('utf-8')
+        for field in POSTING_FIELDS for value in posting_values(atom, field)
+    ]
+    keys.append(f"{SEGMENT_FIELD}\0{ordinal}".encode('utf-8'))
+    return keys
+
+
+def _align(size):
+    return -size % 8
+
+
+def _postings_layout(atoms, terms, segments, key_bytes):
+    """Byte offsets of each section of a postings file, and its total size."""
+    layout = {}
+    position = _POSTINGS_HEADER.size + segments * _COVERED.size
+    position += _align(position)
+    # Arrays are in native byte order - the file is a local cache
+    for name, size in (('offsets', 8 * atoms), ('times', 8 * atoms), ('by_offset', 8 * atoms),
+                       ('order', 4 * atoms), ('terms', _TERM.size * terms), ('keys', key_bytes)):
+        layout[name] = position
+        position += size + _align(size)
+    layout['postings'] = position
+    return layout, position
+
+
+def _postings_view(data):
+    """Postings index over the bytes of a postings file, or None if they aren't one."""
+    if len(data) < _POSTINGS_HEADER.size:
+        return None
+    magic, version, atoms, terms, segments, key_bytes = _POSTINGS_HEADER.unpack_from(data)
+    if magic != POSTINGS_MAGIC or version != POSTINGS_VERSION:
+        return None
+    layout, postings_start = _postings_layout(atoms, terms, segments, key_bytes)
+    if len(data) < postings_start or (len(data) - postings_start) % 4:
+        return None
+    view = memoryview(data)
+    return {
+        'count': atoms,
+        'covered': [
+            _COVERED.unpack_from(data, _POSTINGS_HEADER.size + i * _COVERED.size) for i in range(segments)
+        ],
+        'offsets': view[layout['offsets']:layout['offsets'] + 8 * atoms].cast('Q'),
+        'times': view[layout['times']:layout['times'] + 8 * atoms].cast('d'),
+        # offsets sorted, and the number of the atom at each, for find_atom_number()
+        'by_offset': view[layout['by_offset']:layout['by_offset'] + 8 * atoms].cast('Q'),
+        'order': view[layout['order']:layout['order'] + 4 * atoms].cast('I'),
+        'term_count': terms,
+        'terms': view[layout['terms']:layout['terms'] + _TERM.size * terms],
+        'keys': view[layout['keys']:layout['keys'] + key_bytes],
+        'postings': view[postings_start:].cast('I'),
+    }
+
+
+def _read_postings(index_path):
+    """Map a postings file, or None if it is missing or not a valid index."""
+    try:
+        with open(index_path, 'rb') as f:
+            # The mapping outlives the file object, and a rewrite replaces the file
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None  # ValueError: empty file
+    return _postings_view(data)
+
+
+def _pack_postings(covered, offsets, times, terms):
+    """Bytes of a postings file. terms maps each term key to an array('I') of atom numbers."""
+    keys = sorted(terms)
+    key_blob = b''.join(keys)
+    layout, postings_start = _postings_layout(len(offsets), len(keys), len(covered), len(key_blob))
+    order = array('I', sorted(range(len(offsets)), key=offsets.__getitem__))
+
+    out = bytearray(postings_start)
+    _POSTINGS_HEADER.pack_into(out, 0, POSTINGS_MAGIC, POSTINGS_VERSION,
+                               len(offsets), len(keys), len(covered), len(key_blob))
+    for i, entry in enumerate(covered):
+        _COVERED.pack_into(out, _POSTINGS_HEADER.size + i * _COVERED.size, *entry)
+    for name, section in (('offsets', offsets.tobytes()), ('times', times.tobytes()),
+                          ('by_offset', array('Q', (offsets[n] for n in order)).tobytes()),
+                          ('order', order.tobytes()), ('keys', key_blob)):
+        out[layout[name]:layout[name] + len(section)] = section
+
+    key_start = 0
+    posting_start = 0
+    for i, key in enumerate(keys):
+        _TERM.pack_into(out, layout['terms'] + i * _TERM.size,
+                        key_start, len(key), posting_start, len(terms[key]))
+        key_start += len(key)
+        posting_start += len(terms[key])
+    for key in keys:
+        out += terms[key].tobytes()
+    return bytes(out)
+
+
+def _unpack_postings(index):
+    """Mutable copies of a postings index's arrays and postings lists, for adding to."""
+    terms = {}
+    for i in range(index['term_count']):
+        key_start, key_len, start, length = _TERM.unpack_from(index['terms'], i * _TERM.size)
+        key = bytes(index['keys'][key_start:key_start + key_len])
+        terms[key] = array('I', index['postings'][start:start + length])
+    return array('Q', index['offsets']), array('d', index['times']), terms
+
+
+def get_postings(index, field, value):
+    """Atom numbers whose field has value (already normalised), or () if none."""
+    key = f"{field}\0{value}".encode('utf-8')
+    terms = index['terms']
+    keys = index['keys']
+    lo, hi = 0, index['term_count']
+    while lo < hi:
+        mid = (lo + hi) // 2
+        key_start, key_len, start, length = _TERM.unpack_from(terms, mid * _TERM.size)
+        probe = bytes(keys[key_start:key_start + key_len])
+        if probe < key:
+            lo = mid + 1
+        elif probe > key:
+            hi = mid
+        else:
+            return index['postings'][start:start + length]
+    return ()
+
+
+def get_segment_postings(index, ordinal):
+    """Atom numbers of the atoms in the segment at ordinal in the manifest."""
+    return get_postings(index, SEGMENT_FIELD, str(ordinal))
+
+
+def find_atom_number(index, offset):
+    """Number of the atom at a virtual store offset, or None if it isn't indexed."""
+    by_offset = index['by_offset']
+    i = bisect.bisect_left(by_offset, offset)
+    if i < len(by_offset) and by_offset[i] == offset:
+        return index['order'][i]
+    return None
+
+
+def refresh_postings_index(manifest, index_path):
+    """Load the postings index, catching up on new store lines; saved if it changed.
+
+    Rebuilt from scratch when missing, unreadable, or a segment it covered
+    has shrunk or been rewritten. Lines that aren't valid atoms are skipped.
+    When nothing was appended the file is only mapped, not read.
+    """
+    index = _read_postings(index_path)
+    if index is not None and not covers(index['covered'], manifest):
+        index = None
+
+    added = []
+
+    def add(offset, line):
+        try:
+            atom = json.loads(line)
+        except ValueError:
+            return
+        if isinstance(atom, dict):
+            added.append((offset, atom_time(atom), _posting_keys(atom, split_offset(offset)[0])))
+
+    covered = catch_up(manifest, index['covered'] if index is not None else [], add)
+    if index is not None and covered == index['covered']:
+        return index
+
+    if index is not None:
+        offsets, times, terms = _unpack_postings(index)
+    else:
+        offsets, times, terms = array('Q'), array('d'), {}
+    for offset, timestamp, keys in added:
+        number = len(offsets)
+        offsets.append(offset)
+        times.append(timestamp)
+        for key in keys:
+            if key not in terms:
+                terms[key] = array('I')
+            terms[key].append(number)
+
+    data = _pack_postings(covered, offsets, times, terms)
+    try:
+        _write_atomic(index_path, data)
+    except OSError:
+        pass  # Still usable in memory; rebuilt next time
+    return _postings_view(data)
+
+
+def make_resolver(index, reader):
+    """resolve(atom_id) -> text via the id index, reading lines through a StoreReader."""
+    def resolve(atom_id):
+        offset = find_atom_offset(index, atom_id, reader.read_line)
+        if offset is None:
+            return None
+        return atom_text(json.loads(reader.read_line(offset)))
+    return resolve
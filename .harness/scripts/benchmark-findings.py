@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the keyword matchers behind session-recovery's findings analysis.
+
+Builds a reproducible synthetic corpus of message previews, classifies it
+with every available matcher, checks they agree with each other and reports
+the timings.
+
+Usage: python benchmark-findings.py [MESSAGES]   (default 10000)
+"""
+
+import random
+import sys
+import time
+
+from session_findings import FINDING_CHECKS, HAS_AHOCORASICK, build_matcher
+
+FILLER_WORDS = (
+    "the a of to and in is it that for on with as this was are be at by or "
+    "from code file we you function value test run output data path config"
+).split()
+
+
+def build_corpus(count, seed=1):
+    """Random previews of up to 500 chars, most with zero to two keywords."""
+    rng = random.Random(seed)
+    keywords = [kw for kw_list, _, _ in FINDING_CHECKS for kw in kw_list]
+    corpus = []
+    for _ in range(count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(5, 90))]
+        for _ in range(rng.choice((0, 0, 0, 1, 2))):
+            keyword = rng.choice(keywords)
+            if rng.random() < 0.2:
+                keyword = keyword.upper()
+            words.insert(rng.randrange(len(words) + 1), keyword)
+        corpus.append(' '.join(words)[:500])
+    return corpus
+
+
+def time_matcher(match, corpus, rounds=5):
+    """Best-of-rounds time to classify the corpus, plus the results."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [match(text.lower()) for text in corpus]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    corpus = build_corpus(count)
+    print(f"📊 Findings matcher benchmark ({count} messages)")
+
+    matchers = [
+        ('keyword lists (in)', build_matcher(FINDING_CHECKS, method='keywords')),
+        ('trie regex (stdlib)', build_matcher(FINDING_CHECKS, method='regex')),
+    ]
+    if HAS_AHOCORASICK:
+        matchers.append(('aho-corasick automaton', build_matcher(FINDING_CHECKS, method='automaton')))
+    else:
+        print("   ⚠️  pyahocorasick not installed - the automaton is not timed")
+
+    baseline = None
+    for name, match in matchers:
+        elapsed, results = time_matcher(match, corpus)
+        if baseline is None:
+            baseline = (elapsed, results)
+        elif results != baseline[1]:
+            print(f"   ❌ {name}: results differ from keyword lists")
+            sys.exit(1)
+        speedup = baseline[0] / elapsed
+        print(f"   {name:<24} {elapsed * 1000:8.1f} ms  ({speedup:.1f}x)")
+
+    matched = sum(1 for r in baseline[1] if r is not None)
+    print(f"   ✅ {matched}/{count} messages matched a check")
+
+
+if __name__ == '__main__':
+    main()
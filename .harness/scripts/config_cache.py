@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled-config cache for Harness scripts.
+
+Used by extract-atoms.py (taxonomy.yaml) and validate-integrity.py
+(document-controls.yaml). Parsing YAML - and even importing PyYAML - costs
+tens of milliseconds on every run, so the parsed structure and anything
+compiled from it is pickled under .harness/cache/, keyed on the source
+file's content hash and a version. A warm start is one file read, one hash
+and one unpickle; an edited source file rebuilds transparently.
+
+Regexes are pickled as (pattern, flags) and recompiled by re on load, so
+only the parse and the rest of the build are skipped.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+# Bump when the cache file layout changes
+CACHE_SCHEMA = 1
+
+
+def get_cache_dir(project_root=None):
+    """Get the compiled-config cache directory."""
+    return Path(project_root or '.') / '.harness' / 'cache'
+
+
+def load_cached(source_path, build, version, cache_dir):
+    """Return build(source_text) for source_path, reusing a pickled result when current.
+
+    version identifies the shape of build's output; callers bump it when
+    that changes. A missing, unreadable or stale cache file just means a
+    rebuild, and failing to write one is not an error.
+    """
+    source_path = Path(source_path)
+    data = source_path.read_bytes()
+    key = (CACHE_SCHEMA, version, hashlib.sha1(data).hexdigest())
+    cache_path = Path(cache_dir) / f"{source_path.name}.pickle"
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['key'] == key:
+            return cached['value']
+    except Exception:
+        pass  # Missing, corrupt, or pickled by an incompatible version
+
+    value = build(data.decode('utf-8'))
+
+    # Written to a temp file and renamed, so readers never see a partial cache
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'key': key, 'value': value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+    return value
@@ -13,11 +13,12 @@ Output: .harness/transcripts/session-[id]-[date].md
 """
 
 import sys
-import json
 import os
 from pathlib import Path
 from datetime import datetime
 
+from session_jsonl import iter_records
+
 def get_project_sessions_dir():
     """Find the Claude sessions directory for current project."""
     # Get current working directory and convert to Claude's path format
@@ -57,59 +58,54 @@ def extract_messages(jsonl_path):
     """Extract user and assistant messages from JSONL."""
     messages = []
 
-    with open(jsonl_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                entry = json.loads(line)
-                msg_type = entry.get('type')
-
-                if msg_type == 'user':
-                    content = entry.get('message', {}).get('content', '')
-                    if isinstance(content, str):
-                        messages.append(('user', content))
-                    elif isinstance(content, list):
-                        # Extract text from content blocks
-                        text_parts = []
-                        for item in content:
-                            if isinstance(item, dict):
-                                if item.get('type') == 'text':
-                                    text_parts.append(item.get('text', ''))
-                                elif item.get('type') == 'tool_result':
-                                    # Summarize tool results
-                                    tool_content = item.get('content', '')
-                                    if isinstance(tool_content, str) and len(tool_content) > 500:
-                                        tool_content = tool_content[:500] + '... [truncated]'
-                                    text_parts.append(f"[Tool Result]: {tool_content}")
-                        if text_parts:
-                            messages.append(('user', '\n'.join(text_parts)))
-
-                elif msg_type == 'assistant':
-                    content = entry.get('message', {}).get('content', [])
-                    text_parts = []
-                    for item in content:
-                        if isinstance(item, dict):
-                            if item.get('type') == 'text':
-                                text_parts.append(item.get('text', ''))
-                            elif item.get('type') == 'tool_use':
-                                tool_name = item.get('name', 'unknown')
-                                tool_input = item.get('input', {})
-                                # Brief summary of tool use
-                                if tool_name in ['Read', 'Write', 'Edit']:
-                                    file_path = tool_input.get('file_path', '')
-                                    text_parts.append(f"[{tool_name}: {file_path}]")
-                                elif tool_name == 'Bash':
-                                    cmd = tool_input.get('command', '')[:100]
-                                    text_parts.append(f"[Bash: {cmd}...]")
-                                elif tool_name == 'Task':
-                                    desc = tool_input.get('description', '')
-                                    text_parts.append(f"[Task: {desc}]")
-                                else:
-                                    text_parts.append(f"[{tool_name}]")
-                    if text_parts:
-                        messages.append(('assistant', '\n'.join(text_parts)))
-
-            except json.JSONDecodeError:
-                continue
+    # Other record types are skipped on a byte prefilter without decoding
+    for entry in iter_records(jsonl_path, ('user', 'assistant')):
+        msg_type = entry.get('type')
+
+        if msg_type == 'user':
+            content = entry.get('message', {}).get('content', '')
+            if isinstance(content, str):
+                messages.append(('user', content))
+            elif isinstance(content, list):
+                # Extract text from content blocks
+                text_parts = []
+                for item in content:
+                    if isinstance(item, dict):
+                        if item.get('type') == 'text':
+                            text_parts.append(item.get('text', ''))
+                        elif item.get('type') == 'tool_result':
+                            # Summarize tool results
+                            tool_content = item.get('content', '')
+                            if isinstance(tool_content, str) and len(tool_content) > 500:
+                                tool_content = tool_content[:500] + '... [truncated]'
+                            text_parts.append(f"[Tool Result]: {tool_content}")
+                if text_parts:
+                    messages.append(('user', '\n'.join(text_parts)))
+
+        elif msg_type == 'assistant':
+            content = entry.get('message', {}).get('content', [])
+            text_parts = []
+            for item in content:
+                if isinstance(item, dict):
+                    if item.get('type') == 'text':
+                        text_parts.append(item.get('text', ''))
+                    elif item.get('type') == 'tool_use':
+                        tool_name = item.get('name', 'unknown')
+                        tool_input = item.get('input', {})
+                        # Brief summary of tool use
+                        if tool_name in ['Read', 'Write', 'Edit']:
+                            file_path = tool_input.get('file_path', '')
+                            text_parts.append(f"[{tool_name}: {file_path}]")
+                        elif tool_name == 'Bash':
+                            cmd = tool_input.get('command', '')[:100]
+                            text_parts.append(f"[Bash: {cmd}...]")
+                        elif tool_name == 'Task':
+                            desc = tool_input.get('description', '')
+                            text_parts.append(f"[Task: {desc}]")
+                        else:
+                            text_parts.append(f"[{tool_name}]")
+            if text_parts:
+                messages.append(('assistant', '\n'.join(text_parts)))
 
     return messages
 
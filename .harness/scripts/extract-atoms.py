@@ -4,35 +4,68 @@
 Atom Extraction for Harness Knowledge System.
 
 Extracts atomic knowledge units from session transcripts using taxonomy.yaml.
-Outputs to .harness/atoms.jsonl for queryable knowledge base.
-
-Usage: python extract-atoms.py [--reprocess]
-  --reprocess: Ignore processed state, reprocess all transcripts
+Outputs to the segmented atom store in .harness/atoms/ (see atom_segments.py)
+for queryable knowledge base.
+
+Usage: python extract-atoms.py [--reprocess] [--jobs N]
+  --reprocess: Ignore processed state and re-extract transcripts, replacing
+               their atoms in open segments. Sealed segments never change,
+               so transcripts with atoms in one (including the legacy
+               .harness/atoms.jsonl) are left as they are. A month's
+               segment stays open until the month is over and it has had
+               no new atoms for seal_after_days (taxonomy settings), or
+               until it reaches the segment size limit.
+  --jobs N: Classify transcripts in N worker processes (0 = one per CPU)
 """
 
 import sys
 import json
 import os
 import re
-import yaml
-import uuid
 from pathlib import Path
 from datetime import datetime
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Optional multi-keyword automaton for trigger matching
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+from config_cache import load_cached, get_cache_dir
+from atom_segments import (
+    SEAL_GRACE_DAYS, get_atom_store_dir, get_legacy_store_path, load_manifest, save_manifest,
+    rewrite_segment, seal_segments,
+)
+from atom_store import (
+    TEXT_CHARS, make_atom_id, context_refs, append_atoms,
+    get_atom_index_path, load_atom_index, save_atom_index,
+    get_postings_path, refresh_postings_index,
+)
+from atom_search import SearchUnavailable, get_search_db_path, refresh_search_index
+
+# Bump when compile_classifier()'s output changes shape
+CLASSIFIER_VERSION = 1
 
 def load_taxonomy():
-    """Load taxonomy from YAML file."""
+    """Load taxonomy and its compiled classifier, from the config cache when current."""
     taxonomy_path = Path('.harness/taxonomy.yaml')
     if not taxonomy_path.exists():
         print("❌ Error: .harness/taxonomy.yaml not found")
         sys.exit(1)
 
-    with open(taxonomy_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    # The automaton is only in the cache when pyahocorasick was importable
+    version = (CLASSIFIER_VERSION, HAS_AHOCORASICK)
+    return load_cached(taxonomy_path, build_taxonomy, version, get_cache_dir())
 
-def get_atom_store_path():
-    """Get path to atom store."""
-    return Path('.harness/atoms.jsonl')
+def build_taxonomy(text):
+    """Parse taxonomy YAML and compile its classifier (config cache miss)."""
+    # Imported here so a warm cache never pays for importing yaml
+    import yaml
+    taxonomy = yaml.safe_load(text)
+    return taxonomy, compile_classifier(taxonomy)
 
 def get_extraction_state_path():
     """Get path to extraction state file."""
@@ -47,87 +80,181 @@ def load_extraction_state():
     return {'processed_transcripts': {}}
 
 def save_extraction_state(state):
-    """Save extraction state."""
+    """Save extraction state.
+
+    Saved after every transcript, so it's written to a temp file and renamed
+    to never leave a half-written state behind.
+    """
     state_path = get_extraction_state_path()
     state['last_extraction'] = datetime.now().isoformat()
-    with open(state_path, 'w') as f:
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
         json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+# Heading lines that open a message block in auto-recovery transcripts
+HEADING_ROLES = {
+    '#### 👤 User\n': 'user',
+    '#### 🤖 Assistant\n': 'assistant',
+}
+HEADING_MARKERS = tuple(HEADING_ROLES)
+
+def parse_transcript_lines(lines):
+    """Yield (msg_type, text) for each message block in an iterable of lines.
+
+    A line-by-line state machine: a heading line followed by a blank line
+    opens a block, and the block runs until a later line starting with
+    '---' or '####' (which may itself be the next heading) or the end of
+    the file. Only one message is held at a time.
+    """
+    role = None   # Role of a heading line waiting for its blank line
+    body = None   # Lines of the open block
+    body_role = None
+
+    for line in lines:
+        if body is not None:
+            # The block's first line never ends it
+            if body and line.startswith(('---', '####')):
+                yield body_role, ''.join(body).strip()
+                body = None
+            else:
+                body.append(line)
+                continue
+
+        if role is not None and line == '\n':
+            body_role, role, body = role, None, []
+            continue
 
-def extract_text_from_transcript(transcript_path):
-    """Extract message content from markdown transcript."""
-    messages = []
+        role = None
+        if line.endswith(HEADING_MARKERS):
+            for marker, marker_role in HEADING_ROLES.items():
+                if line.endswith(marker):
+                    role = marker_role
 
-    with open(transcript_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if body is not None:
+        yield body_role, ''.join(body).strip()
 
+def iter_transcript_messages(transcript_path):
+    """Stream message records from a markdown transcript, one at a time."""
     # Extract session metadata
     session_id = transcript_path.stem  # e.g., auto-recovery-20251211-172639
 
-    # Parse the transcript sections
-    # Look for User/Assistant message blocks
-    message_pattern = r'#### (👤 User|🤖 Assistant)\n\n(.*?)(?=\n---|\n####|\Z)'
-    matches = re.findall(message_pattern, content, re.DOTALL)
-
-    for role, text in matches:
-        msg_type = 'user' if 'User' in role else 'assistant'
-        messages.append({
-            'type': msg_type,
-            'content': text.strip(),
-            'session_id': session_id
-        })
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        for position, (msg_type, text) in enumerate(parse_transcript_lines(f)):
+            yield {
+                'type': msg_type,
+                'content': text,
+                'session_id': session_id,
+                'position': position
+            }
 
-    return messages, session_id
+def extract_text_from_transcript(transcript_path):
+    """Extract message content from markdown transcript."""
+    return list(iter_transcript_messages(transcript_path)), transcript_path.stem
+
+def compile_classifier(taxonomy):
+    """Compile the taxonomy's types into a classifier, once per run.
+
+    Triggers are lowercased and patterns compiled up front. Each type becomes
+    an entry (type, tier, trigger confidence, patterns, pattern confidence),
+    in the order classify_message() reports matches: core, domain, then the
+    UNCLASSIFIED catch-all. With pyahocorasick installed, one automaton over
+    every trigger finds all triggered entries in a single scan.
+    """
+    entries = []
+    entry_triggers = []
+
+    def add_entry(type_name, tier, triggers, trigger_confidence, patterns=(), pattern_confidence=None):
+        entries.append({
+            'type': type_name,
+            'tier': tier,
+            'confidence': trigger_confidence,
+            'patterns': [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in patterns],
+            'pattern_confidence': pattern_confidence,
+        })
+        entry_triggers.append(tuple(trigger.lower() for trigger in triggers))
 
-def classify_message(content, taxonomy):
+    for type_name, rules in taxonomy['types']['core'].items():
+        add_entry(
+            type_name, 'core', rules.get('triggers', []),
+            rules.get('confidence', 'high'),
+            rules.get('patterns', []), rules.get('confidence', 'medium'),
+        )
+    for type_name, rules in taxonomy['types']['domain'].items():
+        add_entry(type_name, 'domain', rules.get('triggers', []), rules.get('confidence', 'medium'))
+    catch_all = taxonomy['types']['catch_all'].get('UNCLASSIFIED', {})
+    add_entry('UNCLASSIFIED', 'catch_all', catch_all.get('triggers', []), 'low')
+
+    classifier = {'entries': entries, 'entry_triggers': entry_triggers, 'automaton': None}
+    if HAS_AHOCORASICK:
+        # An empty trigger matches everything, so those entries are always triggered
+        always = frozenset(i for i, triggers in enumerate(entry_triggers) if '' in triggers)
+        owners = {}
+        for i, triggers in enumerate(entry_triggers):
+            for trigger in triggers:
+                if trigger:
+                    owners.setdefault(trigger, set()).add(i)
+        automaton = ahocorasick.Automaton()
+        for trigger, indices in owners.items():
+            automaton.add_word(trigger, frozenset(indices))
+        if owners:
+            automaton.make_automaton()
+            classifier['automaton'] = automaton
+        classifier['always'] = always
+    return classifier
+
+def trigger_checker(content_lower, classifier):
+    """Return is_triggered(entry_index) for a message's lowercased text.
+
+    The automaton scans the text once up front; without it each entry's
+    triggers are only tested when classify_message() asks about that entry.
+    """
+    automaton = classifier['automaton']
+    if automaton is not None:
+        triggered = set(classifier['always'])
+        for _, indices in automaton.iter(content_lower):
+            triggered |= indices
+        return triggered.__contains__
+
+    entry_triggers = classifier['entry_triggers']
+    return lambda i: any(trigger in content_lower for trigger in entry_triggers[i])
+
+def classify_message(content, classifier):
     """Classify a message using taxonomy triggers. Returns list of matching types."""
     matches = []
     content_lower = content.lower()
+    entries = classifier['entries']
+    is_triggered = trigger_checker(content_lower, classifier)
+    catch_all_index = len(entries) - 1
 
-    # Check core types
-    for type_name, rules in taxonomy['types']['core'].items():
-        triggers = rules.get('triggers', [])
-        patterns = rules.get('patterns', [])
-
+    # Core and domain types, in taxonomy order
+    for i, entry in enumerate(entries[:catch_all_index]):
         # Check triggers (simple substring match)
-        if any(trigger.lower() in content_lower for trigger in triggers):
+        if is_triggered(i):
             matches.append({
-                'type': type_name,
-                'tier': 'core',
-                'confidence': rules.get('confidence', 'high')
+                'type': entry['type'],
+                'tier': entry['tier'],
+                'confidence': entry['confidence']
             })
             continue
 
-        # Check regex patterns
-        for pattern in patterns:
-            if re.search(pattern, content, re.IGNORECASE | re.MULTILINE):
+        # Check regex patterns (core types only)
+        for pattern in entry['patterns']:
+            if pattern.search(content):
                 matches.append({
-                    'type': type_name,
-                    'tier': 'core',
-                    'confidence': rules.get('confidence', 'medium')
+                    'type': entry['type'],
+                    'tier': entry['tier'],
+                    'confidence': entry['pattern_confidence']
                 })
                 break
 
-    # Check domain types
-    for type_name, rules in taxonomy['types']['domain'].items():
-        triggers = rules.get('triggers', [])
-
-        if any(trigger.lower() in content_lower for trigger in triggers):
-            matches.append({
-                'type': type_name,
-                'tier': 'domain',
-                'confidence': rules.get('confidence', 'medium')
-            })
-
     # Check catch-all if nothing else matched
-    if not matches:
-        catch_all = taxonomy['types']['catch_all'].get('UNCLASSIFIED', {})
-        triggers = catch_all.get('triggers', [])
-        if any(trigger.lower() in content_lower for trigger in triggers):
-            matches.append({
-                'type': 'UNCLASSIFIED',
-                'tier': 'catch_all',
-                'confidence': 'low'
-            })
+    if not matches and is_triggered(catch_all_index):
+        matches.append({
+            'type': 'UNCLASSIFIED',
+            'tier': 'catch_all',
+            'confidence': 'low'
+        })
 
     return matches
 
@@ -158,9 +285,10 @@ def extract_keywords(content, taxonomy):
     return list(set(found))
 
 def create_atom(message, classifications, keywords, session_id, context_before=None, context_after=None):
-    """Create an atom record."""
+    """Create a compact atom record. context_before/after come from context_refs()."""
+    content = message['content']
     return {
-        'id': str(uuid.uuid4())[:8],
+        'id': make_atom_id(session_id, message['position'], message['content']),
         'session_id': session_id,
         'timestamp': datetime.now().isoformat(),
         'source': message['type'],  # user or assistant
@@ -168,26 +296,47 @@ def create_atom(message, classifications, keywords, session_id, context_before=N
         'primary_type': classifications[0]['type'] if classifications else None,
         'confidence': classifications[0]['confidence'] if classifications else None,
         'keywords': keywords,
-        'content': message['content'][:1000],  # Truncate very long content
-        'content_full': message['content'] if len(message['content']) <= 2000 else message['content'][:2000] + '...[truncated]',
-        'context_before': context_before[:500] if context_before else None,
-        'context_after': context_after[:500] if context_after else None
+        'text': content[:TEXT_CHARS],  # Truncate very long content
+        'truncated': len(content) > TEXT_CHARS,
+        'context_before': context_before or [],
+        'context_after': context_after or []
     }
 
-def process_transcript(transcript_path, taxonomy, settings):
+def iter_with_context(items, before, after):
+    """Yield (preceding, item, following) for a stream of items.
+
+    preceding holds up to `before` earlier items and following up to `after`
+    later ones, both in stream order. Only before + 1 + after items are held:
+    a ring buffer of history plus a look-ahead queue.
+    """
+    history = deque(maxlen=max(before, 0))
+    lookahead = deque()
+    after = max(after, 0)
+
+    for item in items:
+        lookahead.append(item)
+        if len(lookahead) > after:
+            current = lookahead.popleft()
+            yield list(history), current, list(lookahead)
+            history.append(current)
+
+    while lookahead:
+        current = lookahead.popleft()
+        yield list(history), current, list(lookahead)
+        history.append(current)
+
+def process_transcript(transcript_path, taxonomy, classifier, settings):
     """Process a single transcript and extract atoms."""
     atoms = []
-
-    messages, session_id = extract_text_from_transcript(transcript_path)
-
-    if not messages:
-        return atoms, session_id
+    session_id = transcript_path.stem
 
     context_lines_before = settings.get('context_lines_before', 2)
     context_lines_after = settings.get('context_lines_after', 2)
     min_atom_length = settings.get('min_atom_length', 10)
 
-    for i, message in enumerate(messages):
+    candidates = []
+    messages = iter_transcript_messages(transcript_path)
+    for preceding, message, following in iter_with_context(messages, context_lines_before, context_lines_after):
         content = message['content']
 
         # Skip very short messages
@@ -195,35 +344,90 @@ def process_transcript(transcript_path, taxonomy, settings):
             continue
 
         # Classify the message
-        classifications = classify_message(content, taxonomy)
+        classifications = classify_message(content, classifier)
 
         # Only create atom if there's a classification
         if classifications:
-            keywords = extract_keywords(content, taxonomy)
-
-            # Get context
-            context_before = messages[i-1]['content'] if i > 0 else None
-            context_after = messages[i+1]['content'] if i < len(messages) - 1 else None
-
-            atom = create_atom(
-                message,
-                classifications,
-                keywords,
-                session_id,
-                context_before,
-                context_after
-            )
-            atoms.append(atom)
+            candidates.append((message, classifications, preceding, following))
+
+    # Context refers to neighbours that are atoms themselves, so it is
+    # resolved once every atom in the transcript is known
+    atom_ids = {make_atom_id(session_id, m['position'], m['content']) for m, _, _, _ in candidates}
+    for message, classifications, preceding, following in candidates:
+        keywords = extract_keywords(message['content'], taxonomy)
+        atom = create_atom(
+            message,
+            classifications,
+            keywords,
+            session_id,
+            context_refs(preceding, session_id, atom_ids),
+            context_refs(following, session_id, atom_ids)
+        )
+        atoms.append(atom)
 
     return atoms, session_id
 
-def append_atoms_to_store(atoms, store_path):
-    """Append atoms to the JSONL store."""
-    store_path.parent.mkdir(parents=True, exist_ok=True)
+# Set in each worker process by init_worker()
+_worker_config = None
+
+def init_worker(taxonomy, classifier, settings):
+    """Process pool initializer: keep the compiled taxonomy for process_transcript_task()."""
+    global _worker_config
+    _worker_config = (taxonomy, classifier, settings)
+
+def process_transcript_task(transcript_path):
+    """Process one transcript in a worker process."""
+    taxonomy, classifier, settings = _worker_config
+    return process_transcript(transcript_path, taxonomy, classifier, settings)
+
+def process_transcripts(transcript_paths, taxonomy, classifier, settings, jobs):
+    """Yield (atoms, session_id) per transcript, in the given order.
 
-    with open(store_path, 'a', encoding='utf-8') as f:
-        for atom in atoms:
-            f.write(json.dumps(atom) + '\n')
+    With jobs > 1 transcripts are classified in a process pool; results are
+    still yielded in order so the atom store stays stable.
+    """
+    if jobs <= 1 or len(transcript_paths) <= 1:
+        for transcript_path in transcript_paths:
+            yield process_transcript(transcript_path, taxonomy, classifier, settings)
+        return
+
+    workers = min(jobs, len(transcript_paths))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(taxonomy, classifier, settings),
+    ) as executor:
+        yield from executor.map(process_transcript_task, transcript_paths)
+
+def parse_jobs_arg(argv):
+    """Parse --jobs N (0 = one worker per CPU). Defaults to serial extraction."""
+    if '--jobs' not in argv:
+        return 1
+    try:
+        jobs = int(argv[argv.index('--jobs') + 1])
+    except (IndexError, ValueError):
+        print("⚠️  --jobs requires a number, extracting serially")
+        return 1
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+def append_atoms_to_store(atoms, manifest, index):
+    """Append atoms not already in the store to their segments; returns how many were written."""
+    written = append_atoms(atoms, manifest, index)
+    save_manifest(manifest)
+    return written
+
+def clear_reprocessed_atoms(manifest, session_ids):
+    """Drop atoms of session_ids from open segments. Returns (atoms dropped, segments rewritten)."""
+    dropped = 0
+    rewritten = 0
+    for entry in manifest['segments']:
+        if entry['sealed']:
+            continue
+        count = rewrite_segment(manifest, entry, lambda record: record.get('session_id') not in session_ids)
+        if count:
+            dropped += count
+            rewritten += 1
+    return dropped, rewritten
 
 def generate_summary(all_atoms):
     """Generate a summary of extracted atoms."""
@@ -267,7 +471,7 @@ def main():
     print("=" * 40)
 
     # Load taxonomy
-    taxonomy = load_taxonomy()
+    taxonomy, classifier = load_taxonomy()
     settings = taxonomy.get('settings', {})
     print(f"✅ Loaded taxonomy (v{taxonomy.get('_meta', {}).get('version', '?')})")
 
@@ -283,31 +487,44 @@ def main():
     # Load state
     state = load_extraction_state()
     processed = state.get('processed_transcripts', {})
+    atom_store = get_atom_store_dir()
+    manifest = load_manifest(atom_store, get_legacy_store_path())
 
     if reprocess:
         print("🔄 Reprocess mode: ignoring previous state")
-        processed = {}
-        # Clear existing atoms
-        atom_store = get_atom_store_path()
-        if atom_store.exists():
-            atom_store.unlink()
-            print("   Cleared existing atom store")
+        # Sealed segments are never rewritten, so their sessions stay as they are
+        sealed_sessions = {s for entry in manifest['segments'] if entry['sealed'] for s in entry['sessions']}
+        reprocessed = {t.stem for t in transcripts} - sealed_sessions
+        processed = {k: v for k, v in processed.items() if Path(k).stem not in reprocessed}
+        # Record the cleared state first, so an interrupted reprocess resumes
+        # from it instead of trusting entries whose atoms are gone
+        state['processed_transcripts'] = processed
+        save_extraction_state(state)
+
+        dropped, rewritten = clear_reprocessed_atoms(manifest, reprocessed)
+        save_manifest(manifest)
+        if dropped:
+            print(f"   Cleared {dropped} atom(s) from {rewritten} open segment(s)")
+        if len(reprocessed) < len(transcripts):
+            print(f"   Keeping {len(transcripts) - len(reprocessed)} transcript(s) whose atoms are in sealed segments")
 
     # Process each transcript
     all_atoms = []
     new_transcripts = 0
+    skipped_atoms = 0
+    atom_index_path = get_atom_index_path(get_cache_dir())
+    atom_index = load_atom_index(manifest, atom_index_path)
 
-    for transcript_path in transcripts:
-        transcript_key = str(transcript_path)
+    # Skip already processed (reprocessed transcripts were dropped from processed)
+    pending = [t for t in transcripts if str(t) not in processed]
+    jobs = parse_jobs_arg(sys.argv)
+    results = process_transcripts(pending, taxonomy, classifier, settings, jobs)
 
-        # Skip already processed (unless reprocessing)
-        if transcript_key in processed and not reprocess:
-            continue
+    for transcript_path, (atoms, session_id) in zip(pending, results):
+        transcript_key = str(transcript_path)
 
         print(f"\n📄 Processing: {transcript_path.name}")
 
-        atoms, session_id = process_transcript(transcript_path, taxonomy, settings)
-
         if atoms:
             all_atoms.extend(atoms)
             print(f"   Extracted {len(atoms)} atom(s)")
@@ -319,22 +536,47 @@ def main():
         else:
             print(f"   No atoms extracted")
 
-        # Mark as processed
+        # Save atoms, then mark as processed, one transcript at a time
+        # so an interrupted run resumes where it stopped
+        if atoms:
+            written = append_atoms_to_store(atoms, manifest, atom_index)
+            skipped_atoms += len(atoms) - written
         processed[transcript_key] = {
             'processed_at': datetime.now().isoformat(),
             'atoms_count': len(atoms)
         }
+        state['processed_transcripts'] = processed
+        save_extraction_state(state)
         new_transcripts += 1
 
-    # Save atoms
     if all_atoms:
-        atom_store = get_atom_store_path()
-        append_atoms_to_store(all_atoms, atom_store)
-        print(f"\n💾 Saved {len(all_atoms)} atoms to {atom_store}")
-
-    # Save state
-    state['processed_transcripts'] = processed
-    save_extraction_state(state)
+        print(f"\n💾 Saved {len(all_atoms) - skipped_atoms} atoms to {atom_store}")
+        if skipped_atoms:
+            print(f"   Skipped {skipped_atoms} atom(s) already in the store")
+
+    # Seal segments whose month is over and settled (or that have grown too large)
+    sealed = seal_segments(
+        manifest,
+        compress=settings.get('compress_sealed_segments', False),
+        grace_days=settings.get('seal_after_days', SEAL_GRACE_DAYS),
+    )
+    if sealed:
+        save_manifest(manifest)
+        print(f"🔒 Sealed {len(sealed)} segment(s): {', '.join(e['file'] for e in sealed)}")
+
+    if all_atoms or sealed:
+        save_atom_index(atom_index, atom_index_path)
+        # Bring the query indexes up to date while the new atoms are in the page cache
+        refresh_postings_index(manifest, get_postings_path(get_cache_dir()))
+        try:
+            refresh_search_index(manifest, get_search_db_path(get_cache_dir())).close()
+        except SearchUnavailable:
+            pass  # Full-text search is optional
+
+    if not new_transcripts:
+        # Nothing new, but keep recording when extraction last ran
+        state['processed_transcripts'] = processed
+        save_extraction_state(state)
 
     # Generate summary
     if all_atoms:
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental git history audit for the Harness validators.
+
+Used by validate-integrity.py and validate-append-only.py (--audit). The
+history of every audited file is read in one streamed `git log -p`, split
+per commit and per file, and each file's diff lines are handed to the
+caller's scan function. The findings for each commit (its verdict) are kept in a
+cursor under .harness/cache/, so a later audit only scans commits it has
+not seen before.
+
+With jobs > 1 the unseen commits are split into ranges that worker
+processes scan in parallel, each streaming its own `git log -p`; their
+verdicts are merged back in commit order, so reports are unchanged.
+
+Commits are listed with `git rev-list --all`, so rewritten history needs no
+special handling: verdicts for commits no longer reachable from any ref are
+dropped, and only the diverged commits are new. A cursor written for
+different rules (or an unreadable one) just means a full audit.
+"""
+
+import os
+import pickle
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Bump when the cursor layout or the shape of verdicts changes
+AUDIT_VERSION = 1
+
+# Starts each commit in the log output (--format=%x00commit %H);
+# diff lines never begin with NUL
+COMMIT_MARKER = '\0commit '
+
+# Parallel audits hand out ranges of this many commits, but not fewer than
+# a few ranges per worker so that one slow range doesn't hold up the rest
+PARALLEL_CHUNK_COMMITS = 200
+CHUNKS_PER_JOB = 4
+
+
+def get_audit_cursor_path(cache_dir, name):
+    """Get path to the audit cursor of one validator."""
+    return Path(cache_dir) / f"audit-{name}.pickle"
+
+
+def stream_git_lines(args, cwd=None):
+    """Yield the lines of a git command's output as it produces them.
+
+    Output is never buffered whole; closing the generator early stops git.
+    A failing command just yields whatever it printed.
+    """
+    with subprocess.Popen(['git', *args], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                          text=True, errors='replace', cwd=cwd) as process:
+        try:
+            yield from process.stdout
+        finally:
+            if process.poll() is None:
+                process.kill()
+
+
+def list_commits(paths):
+    """Commits reachable from any ref that touch paths, newest first."""
+    result = subprocess.run(
+        ['git', 'rev-list', '--all', '--', *paths],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return result.stdout.split()
+
+
+def iter_commit_diffs(commits, paths):
+    """Yield (commit, {file path: diff lines}) for commits, from one streamed `git log -p`.
+
+    Diffs have no context lines (-U0); each starts with its "diff --git" header.
+
+    Commits without changes to paths may be skipped or yield no files.
+    Raises CalledProcessError if git fails.
+    """
+    cmd = [
+        'git', '-c', 'core.quotePath=false', 'log', '-p', '--no-walk=unsorted', '--stdin',
+        '--no-renames', '--no-ext-diff', '-U0', '--format=%x00commit %H', '--', *paths,
+    ]
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                          text=True, errors='replace') as process:
+        # git reads every revision from stdin before it writes any output
+        process.stdin.write(''.join(f"{commit}\n" for commit in commits))
+        process.stdin.close()
+
+        commit = None
+        files = {}
+        path = None
+        lines = []
+        for line in process.stdout:
+            if line.startswith(COMMIT_MARKER):
+                if path is not None:
+                    files[path] = lines
+                if commit is not None:
+                    yield commit, files
+                commit = line[len(COMMIT_MARKER):].strip()
+                files = {}
+                path = None
+            elif line.startswith('diff --git a/'):
+                if path is not None:
+                    files[path] = lines
+                # Without renames both sides name the same file: "a/<path> b/<path>"
+                names = line.rstrip('\n')[len('diff --git a/'):]
+                path = names[:(len(names) - 3) // 2]
+                lines = [line]
+            elif path is not None:
+                lines.append(line)
+
+        if path is not None:
+            files[path] = lines
+        if commit is not None:
+            yield commit, files
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+
+def scan_commits(commits, paths, scan):
+    """Return {commit: findings} for commits, scanning each file's diff lines with scan."""
+    verdicts = {}
+    for commit, files in iter_commit_diffs(commits, paths):
+        verdicts[commit] = [
+            finding for path, lines in files.items() for finding in scan(path, lines)
+        ]
+    return verdicts
+
+
+def scan_commits_parallel(commits, paths, scan, jobs):
+    """scan_commits() over ranges of commits in jobs worker processes.
+
+    scan must be picklable (a module-level function or a partial of one).
+    """
+    size = max(1, min(PARALLEL_CHUNK_COMMITS, -(-len(commits) // (jobs * CHUNKS_PER_JOB))))
+    chunks = [commits[i:i + size] for i in range(0, len(commits), size)]
+    verdicts = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # map() yields in submission order, so verdicts stay in commit order
+        for chunk_verdicts in pool.map(scan_commits, chunks, [paths] * len(chunks), [scan] * len(chunks)):
+            verdicts.update(chunk_verdicts)
+    return verdicts
+
+
+def load_cursor(cursor_path, rules_key):
+    """Return the stored {commit: findings} for rules_key, or {} if there is none."""
+    try:
+        with open(cursor_path, 'rb') as f:
+            cursor = pickle.load(f)
+        if cursor['version'] == AUDIT_VERSION and cursor['rules'] == rules_key:
+            return cursor['verdicts']
+    except Exception:
+        pass  # Missing, corrupt, or written by an incompatible version
+    return {}
+
+
+def save_cursor(cursor_path, rules_key, verdicts):
+    """Write the audit cursor atomically; failing to write one is not an error."""
+    cursor_path = Path(cursor_path)
+    tmp_path = cursor_path.with_name(f"{cursor_path.name}.{os.getpid()}.tmp")
+    try:
+        cursor_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': AUDIT_VERSION, 'rules': rules_key, 'verdicts': verdicts},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cursor_path)
+    except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def audit_history(paths, scan, rules_key, cursor_path, jobs=1):
+    """Return [(commit, findings)] for every reachable commit touching paths, newest first.
+
+    scan(file_path, lines) returns a list of findings (any picklable values)
+    for one file's diff lines in one commit. rules_key identifies the rules
+    scan applies; stored verdicts are only reused for the same key. With
+    jobs > 1 unseen commits are scanned in that many processes, so scan
+    must be picklable. Returns [] if the history cannot be read.
+    """
+    try:
+        commits = list_commits(paths)
+    except subprocess.CalledProcessError:
+        return []
+
+    verdicts = load_cursor(cursor_path, rules_key)
+    new_commits = [commit for commit in commits if commit not in verdicts]
+
+    if new_commits:
+        try:
+            if jobs > 1 and len(new_commits) > jobs:
+                verdicts.update(scan_commits_parallel(new_commits, paths, scan, jobs))
+            else:
+                verdicts.update(scan_commits(new_commits, paths, scan))
+        except subprocess.CalledProcessError:
+            return []
+        for commit in new_commits:
+            verdicts.setdefault(commit, [])  # Nothing to report for these paths
+
+    # Only reachable commits are kept, so rewritten-away commits drop out
+    current = {commit: verdicts[commit] for commit in commits}
+    if new_commits or len(current) != len(verdicts):
+        save_cursor(cursor_path, rules_key, current)
+
+    return [(commit, current[commit]) for commit in commits]
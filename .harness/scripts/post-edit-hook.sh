@@ -1,12 +1,12 @@
 #!/bin/bash
 # Post-Edit Hook for Document Integrity Validation (D17)
 # Triggers real-time validation after Edit/Write to .harness/ or 00-governance/
+#
+# If a validation server is running (validate-integrity.py --serve), the
+# check is sent to its Unix socket; otherwise a fresh validator runs.
 
-# Read stdin JSON
-INPUT=$(cat)
-
-# Extract file path from tool_input
-FILE_PATH=$(echo "$INPUT" | jq -r '.tool_input.file_path // empty')
+# Read stdin JSON - file path and project directory in one jq call
+{ read -r FILE_PATH; read -r PROJECT_DIR; } < <(jq -r '.tool_input.file_path // "", .cwd // ""')
 
 if [ -z "$FILE_PATH" ]; then
     exit 0  # No file path, skip
@@ -15,7 +15,6 @@ fi
 # Check if file is in monitored directories
 if [[ "$FILE_PATH" == *".harness/"* ]] || [[ "$FILE_PATH" == *"00-governance/"* ]]; then
     # Get project directory
-    PROJECT_DIR=$(echo "$INPUT" | jq -r '.cwd // empty')
     if [ -z "$PROJECT_DIR" ]; then
         PROJECT_DIR="$CLAUDE_PROJECT_DIR"
     fi
@@ -25,8 +24,29 @@ if [[ "$FILE_PATH" == *".harness/"* ]] || [[ "$FILE_PATH" == *"00-governance/"*
 
     # Run validation
     if [ -f "$PROJECT_DIR/.harness/scripts/validate-integrity.py" ]; then
-        python3 "$PROJECT_DIR/.harness/scripts/validate-integrity.py" --realtime "$REL_PATH" 2>&1
-        EXIT_CODE=$?
+        # Ask the validation server first: first line of its answer is the exit code
+        SOCKET="$PROJECT_DIR/.harness/cache/validate.sock"
+        RESPONSE=""
+        if [ -S "$SOCKET" ]; then
+            if command -v nc >/dev/null 2>&1; then
+                RESPONSE=$(printf '%s\n' "$REL_PATH" | nc -U -w 2 "$SOCKET" 2>/dev/null)
+            elif command -v socat >/dev/null 2>&1; then
+                RESPONSE=$(printf '%s\n' "$REL_PATH" | socat -t 2 - "UNIX-CONNECT:$SOCKET" 2>/dev/null)
+            fi
+        fi
+
+        EXIT_CODE="${RESPONSE%%$'\n'*}"
+        if [[ "$EXIT_CODE" =~ ^[0-9]+$ ]]; then
+            OUTPUT="${RESPONSE#"$EXIT_CODE"}"
+            OUTPUT="${OUTPUT#$'\n'}"
+            if [ -n "$OUTPUT" ]; then
+                printf '%s\n' "$OUTPUT"
+            fi
+        else
+            # No server (or no answer) - validate in-process
+            python3 "$PROJECT_DIR/.harness/scripts/validate-integrity.py" --realtime "$REL_PATH" 2>&1
+            EXIT_CODE=$?
+        fi
 
         if [ $EXIT_CODE -eq 2 ]; then
             # Critical error - return blocking message
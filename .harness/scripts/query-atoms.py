@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query the Harness atom store (.harness/atoms/).
+
+Filters come from the postings index in .harness/cache/, which catches up
+on atoms appended since it was last saved; only the lines on the requested
+page are read from the store. Results are newest first, or best match
+first with --search, which uses the full-text index from atom_search.py.
+
+Usage: python query-atoms.py [TERM ...] [--search TEXT] [--since DATE] [--until DATE]
+                             [--limit N] [--offset N] [--json | --count]
+  TERM: field:value - terms are ANDed, OR separates alternatives,
+        a leading - excludes matches (e.g. -type:ERROR)
+  fields: type (primary type), types (any type), keyword, session
+  --search TEXT: Full-text search (FTS5 syntax: words are ANDed,
+        "quoted phrase", prefix*, OR, NOT), ranked by relevance
+  --since DATE: Atoms extracted at or after DATE (ISO format)
+  --until DATE: Atoms extracted before DATE (ISO format)
+  --limit N: Show at most N atoms (default 20)
+  --offset N: Skip the first N matches
+  --json: Print matching atoms as JSON lines
+  --count: Print only the number of matches
+
+Examples:
+  python query-atoms.py type:DECISION keyword:git OR types:ERROR -session:auto-recovery-20251211-013239
+  python query-atoms.py --search '"session recovery" hook*' type:DECISION
+"""
+
+import sys
+import json
+from datetime import datetime
+from itertools import islice
+
+from config_cache import get_cache_dir
+from atom_segments import (
+    OFFSET_BITS, StoreReader, get_atom_store_dir, get_legacy_store_path, load_manifest,
+    segment_overlaps,
+)
+from atom_store import (
+    expand_atom, find_atom_number, get_atom_index_path, get_postings, get_postings_path,
+    get_segment_postings, load_atom_index, make_resolver, refresh_postings_index,
+)
+from atom_search import (
+    SearchUnavailable, count_matches, get_search_db_path, refresh_search_index, search_atoms,
+    search_snippets,
+)
+
+# Query field name -> postings field
+QUERY_FIELDS = {
+    'type': 'primary_type',
+    'types': 'types',
+    'keyword': 'keywords',
+    'session': 'session_id',
+}
+
+DEFAULT_LIMIT = 20
+
+def parse_query(terms):
+    """Parse terms into OR-ed groups of (include, exclude) lists of (field, value)."""
+    groups = [([], [])]
+    for term in terms:
+        if term.upper() == 'OR':
+            groups.append(([], []))
+            continue
+
+        exclude = term.startswith('-')
+        name, sep, value = term.lstrip('-').partition(':')
+        if not sep or name not in QUERY_FIELDS:
+            raise ValueError(f"Unknown term '{term}' (use type:, types:, keyword: or session:)")
+        groups[-1][exclude].append((QUERY_FIELDS[name], value.lower()))
+
+    return [g for g in groups if g[0] or g[1]]
+
+def match_group(index, include, exclude):
+    """Atom numbers matching every include term and no exclude term."""
+    if include:
+        lists = sorted((get_postings(index, f, v) for f, v in include), key=len)
+        matches = set(lists[0])
+        for other in lists[1:]:
+            if not matches:
+                break
+            matches.intersection_update(other)
+    else:
+        matches = set(range(index['count']))
+
+    for field, value in exclude:
+        matches.difference_update(get_postings(index, field, value))
+    return matches
+
+def run_query(index, manifest, groups, since=None, until=None, ranked=None):
+    """Return matching atom numbers, newest first or in the order of ranked search hits.
+
+    With since/until only atoms in segments that overlap the range are
+    candidates; their timestamps are checked after that. ranked may be any
+    iterable, and the result is then an iterator that only reads as many
+    hits as it is asked for.
+    """
+    segments = None
+    if since is not None or until is not None:
+        segments = {
+            ordinal for ordinal, entry in enumerate(manifest['segments'])
+            if segment_overlaps(entry, since, until)
+        }
+
+    matches = None
+    if groups:
+        matches = set()
+        for include, exclude in groups:
+            matches |= match_group(index, include, exclude)
+    elif segments is not None and ranked is None:
+        matches = set()
+        for ordinal in segments:
+            matches.update(get_segment_postings(index, ordinal))
+
+    if ranked is not None:
+        numbers = ranked if matches is None else (n for n in ranked if n in matches)
+    elif matches is not None:
+        numbers = sorted(matches, reverse=True)
+    else:
+        numbers = range(index['count'] - 1, -1, -1)
+
+    if segments is not None:
+        offsets = index['offsets']
+        times = index['times']
+        numbers = (
+            n for n in numbers
+            if offsets[n] >> OFFSET_BITS in segments
+            and (since is None or times[n] >= since) and (until is None or times[n] < until)
+        )
+        if ranked is None:
+            numbers = list(numbers)
+    return numbers
+
+def read_atoms(manifest, offsets, index_path):
+    """Read the atoms at the given store offsets, in order and in full shape."""
+    if not offsets:
+        return []
+    with StoreReader(manifest) as reader:
+        records = [json.loads(reader.read_line(offset)) for offset in offsets]
+
+        # Context refs are looked up through the id index, loaded only if needed
+        resolver = None
+
+        def resolve(atom_id):
+            nonlocal resolver
+            if resolver is None:
+                resolver = make_resolver(load_atom_index(manifest, index_path), reader)
+            return resolver(atom_id)
+
+        return [expand_atom(record, resolve) for record in records]
+
+def parse_value_arg(argv, flag, convert):
+    """Return convert(value) for '<flag> value' in argv, or None if absent."""
+    if flag not in argv:
+        return None
+    try:
+        return convert(argv[argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        raise ValueError(f"{flag} requires a valid value")
+
+def split_args(argv):
+    """Return the query terms in argv, skipping options and their values."""
+    valued = {'--search', '--since', '--until', '--limit', '--offset'}
+    terms = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in valued:
+            skip = True
+        elif not arg.startswith('--'):
+            terms.append(arg)
+    return terms
+
+def format_atom(atom, snippet=None):
+    """Human-readable summary of one atom, showing snippet in place of its content."""
+    lines = [f"\n[{atom.get('primary_type')}] {atom.get('id')}  {atom.get('session_id')}  {str(atom.get('timestamp', ''))[:19]}"]
+    if atom.get('keywords'):
+        lines.append(f"   keywords: {', '.join(atom['keywords'])}")
+    if snippet is not None:
+        lines.append(f"   {' '.join(snippet.split())}")
+    else:
+        content = ' '.join(atom.get('content', '').split())
+        lines.append(f"   {content[:200]}{'...' if len(content) > 200 else ''}")
+    return '\n'.join(lines)
+
+def main():
+    argv = sys.argv[1:]
+
+    def epoch(value):
+        return datetime.fromisoformat(value).timestamp()
+
+    try:
+        groups = parse_query(split_args(argv))
+        search = parse_value_arg(argv, '--search', str)
+        since = parse_value_arg(argv, '--since', epoch)
+        until = parse_value_arg(argv, '--until', epoch)
+        limit = parse_value_arg(argv, '--limit', int)
+        offset = parse_value_arg(argv, '--offset', int) or 0
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if limit is None:
+        limit = DEFAULT_LIMIT
+
+    manifest = load_manifest(get_atom_store_dir(), get_legacy_store_path())
+    if not manifest['segments']:
+        print("❌ No atom store found - run extract-atoms.py first")
+        return
+
+    cache_dir = get_cache_dir()
+    index = refresh_postings_index(manifest, get_postings_path(cache_dir))
+
+    search_db = None
+    ranked = None
+    filtered = bool(groups) or since is not None or until is not None
+    if search is not None:
+        try:
+            search_db = refresh_search_index(manifest, get_search_db_path(cache_dir))
+            if '--count' in argv and not filtered:
+                print(count_matches(search_db, search))
+                return
+            # Unfiltered, the search query itself selects the page
+            hits = search_atoms(search_db, search) if filtered else search_atoms(search_db, search, limit, offset)
+        except (SearchUnavailable, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        # Search hits are store offsets; filters work on atom numbers
+        ranked = (n for n in (find_atom_number(index, o) for o in hits) if n is not None)
+
+    numbers = run_query(index, manifest, groups, since, until, ranked)
+
+    if '--count' in argv:
+        print(sum(1 for _ in numbers) if ranked is not None else len(numbers))
+        return
+
+    if ranked is not None:
+        # Hits are read only up to the end of the page, so there is no total
+        total = None
+        start = offset if filtered else 0
+        page = list(islice(numbers, start, start + limit))
+    else:
+        total = len(numbers)
+        page = numbers[offset:offset + limit]
+    offsets = [index['offsets'][n] for n in page]
+    atoms = read_atoms(manifest, offsets, get_atom_index_path(cache_dir))
+    snippets = search_snippets(search_db, search, offsets) if search_db is not None else {}
+
+    if '--json' in argv:
+        for atom in atoms:
+            print(json.dumps(atom))
+        return
+
+    if total is None:
+        if not atoms:
+            print(f"🔎 No matching atoms{f' after the first {offset}' if offset else ''}")
+            return
+        print(f"🔎 Best matches {offset + 1}-{offset + len(atoms)} (--count for the total)")
+    else:
+        if not atoms:
+            print(f"🔎 {total} matching atom(s)")
+            return
+        print(f"🔎 {total} matching atom(s), showing {offset + 1}-{offset + len(atoms)}")
+    for store_offset, atom in zip(offsets, atoms):
+        print(format_atom(atom, snippets.get(store_offset)))
+
+if __name__ == '__main__':
+    main()
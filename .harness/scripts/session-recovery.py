@@ -13,91 +13,339 @@ Runs on SessionStart to:
    - Full transcript
 
 Usage: Called automatically via SessionStart hook, or manually
+  python session-recovery.py [--jobs N] [--budget-ms N]
+  --jobs N: Scan changed session files in N worker processes (0 = one per CPU)
+  --budget-ms N: Print a high-priority preview within N ms and hand the
+      transcript export, state save and git health check to a detached
+      background worker (output in .harness/recovery.log)
 """
 
 import sys
 import json
 import os
 import re
+import signal
+import contextlib
+import hashlib
+import shutil
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 from datetime import datetime
 from collections import Counter
 
+try:
+    import fcntl
+except ImportError:  # Windows: runs are not serialized
+    fcntl = None
+
+from session_findings import new_findings_tracker, analyze_for_undocumented, top_findings
+from session_jsonl import (
+    PREVIEW_CHARS, SessionMessage, type_prefilter, iter_lines, is_tool_result_only,
+    loads, message_text, intern_source,
+)
+
+# Held by full recovery runs; the deferred worker logs its output next to it
+RECOVERY_LOCK_PATH = Path('.harness/recovery.lock')
+RECOVERY_LOG_PATH = Path('.harness/recovery.log')
+
+# Part of a --budget-ms budget kept back for printing the preview
+BUDGET_PRINT_RESERVE_MS = 50
+
+# Bytes hashed at the start of a session file to detect rotation/replacement
+FINGERPRINT_HEAD_BYTES = 4096
+
+
 def get_recovery_state_path():
     return Path('.harness/recovery-state.json')
 
 
-def run_git_command(cmd, cwd=None):
-    """Run a git command and return output."""
+def run_git_command(args, cwd=None):
+    """Run a git command (argument list, no shell) and return output."""
     try:
         result = subprocess.run(
-            cmd, shell=True, capture_output=True, text=True, cwd=cwd
+            args, capture_output=True, text=True, cwd=cwd
         )
         return result.stdout.strip(), result.returncode == 0
     except:
         return "", False
 
 
-def check_git_health():
-    """Check git status across worktrees and branches."""
-    print("\n🔀 GIT HEALTH CHECK")
+def parse_worktrees(porcelain_output):
+    """Parse `git worktree list --porcelain` into [{'path', 'branch'}]."""
+    worktrees = []
+    for block in porcelain_output.split('\n\n'):
+        fields = dict(
+            line.split(' ', 1) if ' ' in line else (line, '')
+            for line in block.split('\n') if line.strip()
+        )
+        if 'worktree' not in fields:
+            continue
+        branch = fields.get('branch', '')
+        branch = branch[len('refs/heads/'):] if branch.startswith('refs/heads/') else 'detached'
+        worktrees.append({'path': fields['worktree'], 'branch': branch})
+    return worktrees
 
-    # Get worktrees
-    worktrees_output, ok = run_git_command("git worktree list")
+
+def count_ahead_behind(branch_tips, base='main'):
+    """Count commits each branch is ahead/behind base in a fixed number of git calls.
+
+    branch_tips is {branch: commit}. Uses for-each-ref's ahead-behind atom
+    (git 2.41+), otherwise walks the commits above the common merge base of
+    all tips once and counts reachability per branch.
+    """
+    counts = {name: (0, 0) for name in branch_tips}
+    if base not in branch_tips:
+        return counts
+
+    output, ok = run_git_command([
+        'git', 'for-each-ref', f'--format=%(refname:short)%09%(ahead-behind:{base})', 'refs/heads'
+    ])
+    if ok:
+        for line in output.split('\n'):
+            name, _, ahead_behind = line.partition('\t')
+            ahead, _, behind = ahead_behind.partition(' ')
+            if name in counts and ahead.isdigit() and behind.isdigit():
+                counts[name] = (int(ahead), int(behind))
+        return counts
+
+    # Older git: one bit per branch, propagated from children to parents
+    names = list(branch_tips)
+    tips = sorted(set(branch_tips.values()))
+    masks = {}
+    for bit, name in enumerate(names):
+        masks[branch_tips[name]] = masks.get(branch_tips[name], 0) | (1 << bit)
+
+    # Everything below the merge base of all tips is shared and cancels out
+    merge_base, ok = run_git_command(['git', 'merge-base', '--octopus', *tips])
+    exclude = [f'^{merge_base}'] if ok and merge_base else []
+
+    walk, ok = run_git_command(['git', 'rev-list', '--topo-order', '--parents', *tips, *exclude])
     if not ok:
-        print("   ⚠️  Not a git repository or git not available")
-        return
+        return counts
 
-    worktrees = []
-    for line in worktrees_output.split('\n'):
-        if line.strip():
-            parts = line.split()
-            if len(parts) >= 2:
-                path = parts[0]
-                branch = parts[-1].strip('[]') if '[' in line else 'detached'
-                worktrees.append({'path': path, 'branch': branch})
+    region = Counter()
+    for line in walk.split('\n'):
+        commits = line.split()
+        if not commits:
+            continue
+        mask = masks.get(commits[0], 0)
+        region[mask] += 1
+        for parent in commits[1:]:
+            masks[parent] = masks.get(parent, 0) | mask
+
+    base_bit = 1 << names.index(base)
+    for bit, name in enumerate(names):
+        branch_bit = 1 << bit
+        ahead = sum(n for mask, n in region.items() if mask & branch_bit and not mask & base_bit)
+        behind = sum(n for mask, n in region.items() if mask & base_bit and not mask & branch_bit)
+        counts[name] = (ahead, behind)
+    return counts
+
+
+def find_git_dirs():
+    """Locate (git_dir, common_dir) for the current worktree without running git."""
+    current = Path.cwd().resolve()
+    for folder in [current, *current.parents]:
+        dot_git = folder / '.git'
+        if dot_git.is_dir():
+            git_dir = dot_git
+            break
+        if dot_git.is_file():
+            # Linked worktree: .git is a "gitdir: <path>" pointer
+            content = dot_git.read_text().strip()
+            if not content.startswith('gitdir:'):
+                return None
+            git_dir = (folder / content[len('gitdir:'):].strip()).resolve()
+            break
+    else:
+        return None
 
-    # Get current branch
-    current_branch, _ = run_git_command("git rev-parse --abbrev-ref HEAD")
+    commondir_file = git_dir / 'commondir'
+    if commondir_file.exists():
+        common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+    else:
+        common_dir = git_dir
+    return git_dir, common_dir
 
-    # Get remote branches
-    remote_branches, _ = run_git_command("git branch -r")
-    remote_list = [b.strip().replace('origin/', '') for b in remote_branches.split('\n') if b.strip()]
 
-    # Check each branch status
-    branches_info = []
-    local_branches, _ = run_git_command("git branch --format='%(refname:short)'")
+def stat_signature(path):
+    """Cheap change signature for a file or directory."""
+    try:
+        st = os.stat(path)
+        return f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        return "-"
+
+
+def read_small_file(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def git_ref_fingerprint(git_dir, common_dir):
+    """Fingerprint the git state the health report depends on.
+
+    Covers HEAD, the index, packed-refs, every loose ref and the worktree
+    list using stat() and small reads only - no git processes.
+    """
+    parts = [
+        str(git_dir),
+        read_small_file(git_dir / 'HEAD'),
+        read_small_file(common_dir / 'HEAD'),
+        stat_signature(git_dir / 'index'),
+        stat_signature(common_dir / 'packed-refs'),
+    ]
+
+    for ref_root in ('refs', 'reftable'):
+        for dirpath, dirnames, filenames in os.walk(common_dir / ref_root):
+            dirnames.sort()
+            parts.append(f"{dirpath}={stat_signature(dirpath)}")
+            for filename in sorted(filenames):
+                parts.append(f"{filename}={stat_signature(os.path.join(dirpath, filename))}")
+
+    worktrees_dir = common_dir / 'worktrees'
+    if worktrees_dir.is_dir():
+        for worktree in sorted(worktrees_dir.iterdir()):
+            parts.append(read_small_file(worktree / 'gitdir'))
+            parts.append(read_small_file(worktree / 'HEAD'))
+
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_git_health_cache_path(common_dir):
+    # Lives in the shared git dir so every worktree reuses the branch table
+    return common_dir / 'harness-git-health.json'
+
+
+def load_git_health_cache(common_dir):
+    cache_path = get_git_health_cache_path(common_dir)
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+        if cache.get('version') == 1:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {
+        'version': 1,
+        'worktrees': {},  # {git_dir: {'fingerprint', 'health'}}
+        'branches': {}    # {branch: {'commit', 'base', 'ahead', 'behind'}}
+    }
 
-    for branch in local_branches.split('\n'):
-        branch = branch.strip().strip("'")
-        if not branch:
-            continue
 
-        # Check if ahead/behind main
-        ahead, _ = run_git_command(f"git rev-list main..{branch} --count")
-        behind, _ = run_git_command(f"git rev-list {branch}..main --count")
+def save_git_health_cache(common_dir, cache):
+    # Forget worktrees that have been removed
+    cache['worktrees'] = {
+        git_dir: entry for git_dir, entry in cache['worktrees'].items() if Path(git_dir).exists()
+    }
+    # Shared by every worktree, so written to a temp file and renamed - a
+    # concurrent run never sees (or leaves behind) a partial cache
+    cache_path = get_git_health_cache_path(common_dir)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def collect_git_health(branch_cache):
+    """Collect branch and worktree state in a fixed number of git calls.
+
+    Ahead/behind counts are only recomputed for branches whose tip or main
+    moved since they were cached in branch_cache, which is updated in place.
+    Returns None outside a git repository.
+    """
+    # Get worktrees
+    worktrees_output, ok = run_git_command(['git', 'worktree', 'list', '--porcelain'])
+    if not ok:
+        return None
 
-        ahead = int(ahead) if ahead.isdigit() else 0
-        behind = int(behind) if behind.isdigit() else 0
+    worktrees = parse_worktrees(worktrees_output)
 
+    # Local branches (with the current one marked) and remote branches in one call
+    refs_output, _ = run_git_command([
+        'git', 'for-each-ref', '--format=%(refname)%09%(objectname)%09%(HEAD)', 'refs/heads', 'refs/remotes'
+    ])
+    current_branch = 'HEAD'  # What rev-parse --abbrev-ref reports when detached
+    branch_tips = {}
+    remote_list = []
+    for line in refs_output.split('\n'):
+        parts = line.split('\t')
+        if len(parts) < 2:
+            continue
+        refname, commit = parts[0], parts[1]
+        head_marker = parts[2] if len(parts) > 2 else ''  # Trailing space stripped on the last line
+        if refname.startswith('refs/heads/'):
+            name = refname[len('refs/heads/'):]
+            branch_tips[name] = commit
+            if head_marker == '*':
+                current_branch = name
+        elif refname.startswith('refs/remotes/'):
+            remote_list.append(refname[len('refs/remotes/'):].replace('origin/', ''))
+
+    # Only branches whose tip or base moved need new ahead/behind counts
+    main_commit = branch_tips.get('main', '')
+    changed_tips = {}
+    for name, commit in branch_tips.items():
+        cached = branch_cache.get(name)
+        if not cached or cached['commit'] != commit or cached['base'] != main_commit:
+            changed_tips[name] = commit
+    if changed_tips:
+        if main_commit:
+            changed_tips['main'] = main_commit
+        for name, (ahead, behind) in count_ahead_behind(changed_tips).items():
+            branch_cache[name] = {'commit': branch_tips[name], 'base': main_commit, 'ahead': ahead, 'behind': behind}
+    for name in list(branch_cache):
+        if name not in branch_tips:
+            del branch_cache[name]
+
+    # Check each branch status
+    branches_info = []
+    for branch in branch_tips:
         on_remote = branch in remote_list or branch == 'main'
         is_current = branch == current_branch
 
         branches_info.append({
             'name': branch,
-            'ahead': ahead,
-            'behind': behind,
+            'ahead': branch_cache[branch]['ahead'],
+            'behind': branch_cache[branch]['behind'],
             'on_remote': on_remote,
             'is_current': is_current
         })
 
-    # Check for uncommitted changes
-    status_output, _ = run_git_command("git status --porcelain")
-    has_uncommitted = bool(status_output.strip())
+    if current_branch in branch_tips:
+        current_commit = branch_tips[current_branch]
+    else:
+        current_commit, _ = run_git_command(['git', 'rev-parse', 'HEAD'])
+
+    return {
+        'worktrees': worktrees,
+        'current_branch': current_branch,
+        'branches': branches_info,
+        'current_commit': current_commit,
+        'main_commit': main_commit,
+    }
+
+
+def render_git_health(health, has_uncommitted):
+    """Render the git health box, warnings and suggestions as output lines."""
+    lines = []
+    worktrees = health['worktrees']
+    current_branch = health['current_branch']
+    branches_info = health['branches']
 
     # Build status display
-    print("   ╔═══════════════════════════════════════════════════════════╗")
+    lines.append("   ╔═══════════════════════════════════════════════════════════╗")
 
     # Determine overall status
     unmerged = [b for b in branches_info if b['ahead'] > 0 and b['name'] != 'main']
@@ -105,13 +353,13 @@ def check_git_health():
     unpushed = [b for b in branches_info if not b['on_remote'] and b['name'] != 'main']
 
     if not unmerged and not has_uncommitted and not unpushed:
-        print("   ║              GIT STATUS - ALL CLEAN! ✅                   ║")
+        lines.append("   ║              GIT STATUS - ALL CLEAN! ✅                   ║")
     else:
-        print("   ║              GIT STATUS - ACTION NEEDED ⚠️                ║")
+        lines.append("   ║              GIT STATUS - ACTION NEEDED ⚠️                ║")
 
-    print("   ╠═══════════════════════════════════════════════════════════╣")
-    print("   ║ Branch               │ vs Main  │ GitHub │ Status        ║")
-    print("   ╠═══════════════════════════════════════════════════════════╣")
+    lines.append("   ╠═══════════════════════════════════════════════════════════╣")
+    lines.append("   ║ Branch               │ vs Main  │ GitHub │ Status        ║")
+    lines.append("   ╠═══════════════════════════════════════════════════════════╣")
 
     for b in branches_info:
         name = b['name'][:18].ljust(18)
@@ -139,54 +387,51 @@ def check_git_health():
         else:
             status = "ok"
 
-        print(f"   ║ {name} │ {vs_main} │   {github}    │ {status.ljust(13)} ║")
+        lines.append(f"   ║ {name} │ {vs_main} │   {github}    │ {status.ljust(13)} ║")
 
-    print("   ╠═══════════════════════════════════════════════════════════╣")
+    lines.append("   ╠═══════════════════════════════════════════════════════════╣")
 
     # Worktrees section
-    print("   ║ WORKTREES                                                 ║")
+    lines.append("   ║ WORKTREES                                                 ║")
     for wt in worktrees[:3]:  # Limit to 3
         path_short = wt['path'][-45:] if len(wt['path']) > 45 else wt['path']
-        print(f"   ║  {path_short.ljust(45)} → {wt['branch'][:10]} ║")
+        lines.append(f"   ║  {path_short.ljust(45)} → {wt['branch'][:10]} ║")
     if len(worktrees) > 3:
-        print(f"   ║  ... and {len(worktrees) - 3} more                                        ║")
+        lines.append(f"   ║  ... and {len(worktrees) - 3} more                                        ║")
 
-    print("   ╠═══════════════════════════════════════════════════════════╣")
+    lines.append("   ╠═══════════════════════════════════════════════════════════╣")
 
     # Summary
     if has_uncommitted:
-        print("   ║ ⚠️  Uncommitted changes in working directory              ║")
+        lines.append("   ║ ⚠️  Uncommitted changes in working directory              ║")
     if unmerged:
         names = ', '.join(b['name'] for b in unmerged[:3])
-        print(f"   ║ 📤 Unmerged branches: {names[:35].ljust(35)} ║")
+        lines.append(f"   ║ 📤 Unmerged branches: {names[:35].ljust(35)} ║")
     if unpushed:
         names = ', '.join(b['name'] for b in unpushed[:3])
-        print(f"   ║ 🔒 Not on GitHub: {names[:39].ljust(39)} ║")
+        lines.append(f"   ║ 🔒 Not on GitHub: {names[:39].ljust(39)} ║")
     if not unmerged and not has_uncommitted and not unpushed:
-        print("   ║ ✅ All work merged and pushed                             ║")
+        lines.append("   ║ ✅ All work merged and pushed                             ║")
 
-    print("   ╚═══════════════════════════════════════════════════════════╝")
+    lines.append("   ╚═══════════════════════════════════════════════════════════╝")
 
     # === CRITICAL: Warn about stale worktree issue ===
     # If there are unmerged branches AND current branch is at same commit as main,
     # this session likely branched from stale main
     if unmerged and current_branch != 'main':
-        current_commit, _ = run_git_command("git rev-parse HEAD")
-        main_commit, _ = run_git_command("git rev-parse main")
-
-        if current_commit == main_commit:
-            print("")
-            print("   ┌─────────────────────────────────────────────────────────┐")
-            print("   │  🚨 STALE WORKTREE WARNING                              │")
-            print("   │                                                         │")
-            print("   │  This branch was created from main, but main is behind  │")
-            print("   │  other branches with unmerged work.                     │")
-            print("   │                                                         │")
-            print("   │  You're missing commits from: " + ", ".join(b['name'] for b in unmerged[:2]).ljust(24) + " │")
-            print("   │                                                         │")
-            print("   │  RECOMMENDED: Merge unmerged branches to main first,    │")
-            print("   │  then run: git merge main                               │")
-            print("   └─────────────────────────────────────────────────────────┘")
+        if health['current_commit'] == health['main_commit']:
+            lines.append("")
+            lines.append("   ┌─────────────────────────────────────────────────────────┐")
+            lines.append("   │  🚨 STALE WORKTREE WARNING                              │")
+            lines.append("   │                                                         │")
+            lines.append("   │  This branch was created from main, but main is behind  │")
+            lines.append("   │  other branches with unmerged work.                     │")
+            lines.append("   │                                                         │")
+            lines.append("   │  You're missing commits from: " + ", ".join(b['name'] for b in unmerged[:2]).ljust(24) + " │")
+            lines.append("   │                                                         │")
+            lines.append("   │  RECOMMENDED: Merge unmerged branches to main first,    │")
+            lines.append("   │  then run: git merge main                               │")
+            lines.append("   └─────────────────────────────────────────────────────────┘")
 
     # Actionable suggestions
     suggestions = []
@@ -202,9 +447,53 @@ def check_git_health():
         suggestions.append(f"💡 Stale branches ({stale_names}) can be deleted after merging")
 
     if suggestions:
-        print("\n   📋 SUGGESTED ACTIONS:")
+        lines.append("\n   📋 SUGGESTED ACTIONS:")
         for s in suggestions:
-            print(f"   {s}")
+            lines.append(f"   {s}")
+
+    return lines
+
+
+def check_git_health():
+    """Check git status across worktrees and branches.
+
+    The branch/worktree part of the report is cached per worktree and reused
+    while the ref fingerprint is unchanged.
+    """
+    print("\n🔀 GIT HEALTH CHECK")
+    started = time.perf_counter()
+
+    git_dirs = find_git_dirs()
+    health = None
+    cached = False
+    if git_dirs:
+        git_dir, common_dir = git_dirs
+        fingerprint = git_ref_fingerprint(git_dir, common_dir)
+        cache = load_git_health_cache(common_dir)
+        entry = cache['worktrees'].get(str(git_dir))
+        if entry and entry['fingerprint'] == fingerprint:
+            health = entry['health']
+            cached = True
+        else:
+            health = collect_git_health(cache['branches'])
+            if health:
+                cache['worktrees'][str(git_dir)] = {'fingerprint': fingerprint, 'health': health}
+                save_git_health_cache(common_dir, cache)
+
+    if not health:
+        print("   ⚠️  Not a git repository or git not available")
+        return
+
+    # Working-tree edits don't touch refs or the index, so this is always checked.
+    # --no-optional-locks keeps status from rewriting the index (and the fingerprint).
+    status_output, _ = run_git_command(['git', '--no-optional-locks', 'status', '--porcelain'])
+    has_uncommitted = bool(status_output.strip())
+
+    for line in render_git_health(health, has_uncommitted):
+        print(line)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"\n   ⏱️  Git health checked in {elapsed_ms:.0f} ms{' (cached)' if cached else ''}")
 
 
 def find_all_harness_folders():
@@ -231,22 +520,95 @@ def load_recovery_state():
             return json.load(f)
     return {
         'last_check_timestamp': None,
-        'processed_files': {}  # {filepath: last_line_count}
+        # {filepath: {offset, lines, inode, size, mtime_ns, head_len, head_hash}}
+        # Older state files stored a bare line count per file; see plan_file_scan()
+        'processed_files': {}
     }
 
 def save_recovery_state(state):
     state_path = get_recovery_state_path()
     state_path.parent.mkdir(parents=True, exist_ok=True)
     state['last_check_timestamp'] = datetime.now().isoformat()
-    with open(state_path, 'w') as f:
-        json.dump(state, f, indent=2)
+    # The deferred worker writes this while later hook runs read it, so it is
+    # written to a temp file and renamed - a reader never sees a partial file
+    tmp_path = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def hash_head(head):
+    """Hash the leading bytes of a session file."""
+    return hashlib.sha1(head).hexdigest()
+
+def plan_file_scan(jsonl_path, file_state):
+    """Decide where to resume scanning a session file.
+
+    Returns (start_offset, start_line, stat) or None when the file is unchanged
+    since the last check and does not need to be opened at all. start_offset is
+    None for legacy state that only recorded a line count.
+    """
+    stat = os.stat(jsonl_path)
+
+    if isinstance(file_state, int):
+        # Legacy state: resume by skipping lines, the file gets a byte offset after this scan
+        return None, file_state, stat
+
+    if not file_state:
+        return 0, 0, stat
+
+    unchanged = (
+        file_state.get('inode') == stat.st_ino
+        and file_state.get('size') == stat.st_size
+        and file_state.get('mtime_ns') == stat.st_mtime_ns
+    )
+    if unchanged:
+        return None
+
+    offset = file_state.get('offset', 0)
+    if stat.st_size < offset:
+        # Truncated - the old offset points past the end of the file
+        return 0, 0, stat
+
+    # Same size but a different inode/mtime, or grown: confirm it is still the same file
+    head_len = file_state.get('head_len', 0)
+    with open(jsonl_path, 'rb') as f:
+        head = f.read(head_len)
+    if len(head) != head_len or hash_head(head) != file_state.get('head_hash'):
+        # Rotated or replaced - scan the new file from the start
+        return 0, 0, stat
+
+    return offset, file_state.get('lines', 0), stat
+
+def build_file_state(jsonl_path, stat, offset, lines):
+    """Build the fingerprint stored for a session file after a scan."""
+    with open(jsonl_path, 'rb') as f:
+        head = f.read(min(FINGERPRINT_HEAD_BYTES, offset))
+    return {
+        'offset': offset,
+        'lines': lines,
+        'inode': stat.st_ino,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'head_len': len(head),
+        'head_hash': hash_head(head),
+    }
+
+def extract_new_entries(jsonl_path, source_id, start_offset, start_line, on_message=None):
+    """Extract all entries (messages + tool calls) added since last check.
 
-def extract_new_entries(jsonl_path, last_line_count):
-    """Extract all entries (messages + tool calls) added since last check."""
+    Seeks straight to start_offset and also returns the byte offset and line
+    count reached, so the next check can resume from there. Messages are
+    SessionMessage records tagged with source_id; on_message, if given, is
+    called with each one as soon as it is read.
+    """
     messages = []
     tool_calls = []
     files_touched = set()
-    current_line = 0
+    current_line = start_line
 
     # Patterns for extracting file paths
     file_patterns = [
@@ -254,35 +616,52 @@ def extract_new_entries(jsonl_path, last_line_count):
         r'file[_-]?path["\s:]+["\']?([^"\'<>\s]+)["\']?',
     ]
 
-    with open(jsonl_path, 'r', encoding='utf-8') as f:
-        for line in f:
+    record_types = type_prefilter(('user', 'assistant'))
+
+    with open(jsonl_path, 'rb') as f:
+        if start_offset is None:
+            # Legacy line-count state: skip already processed lines once
+            current_line = 0
+            while current_line < start_line and f.readline():
+                current_line += 1
+        else:
+            f.seek(start_offset)
+        offset = f.tell()
+
+        for raw_line, size in iter_lines(f, skip_tool_results=True):
+            if raw_line is not None and not raw_line.endswith(b'\n'):
+                # Unterminated last line: only consume it if it decodes,
+                # a half-written entry is picked up on the next check
+                try:
+                    loads(raw_line)
+                except ValueError:
+                    break
+            offset += size
             current_line += 1
-            if current_line <= last_line_count:
+
+            # Records that can't yield messages or tool calls are never decoded
+            if raw_line is None or not record_types.search(raw_line) or is_tool_result_only(raw_line):
                 continue
 
             try:
-                entry = json.loads(line)
+                entry = loads(raw_line)
                 msg_type = entry.get('type')
                 timestamp = entry.get('timestamp', '')
 
                 # Extract user/assistant messages
                 if msg_type in ['user', 'assistant']:
-                    content = entry.get('message', {}).get('content', '')
-                    if isinstance(content, list):
-                        text_parts = []
-                        for item in content:
-                            if isinstance(item, dict) and item.get('type') == 'text':
-                                text_parts.append(item.get('text', ''))
-                        content = ' '.join(text_parts)
+                    content = message_text(entry)
                     if content:
-                        messages.append({
-                            'type': msg_type,
-                            'content': content[:500],
-                            'full_content': content,
-                            'line': current_line,
-                            'timestamp': timestamp,
-                            'source': str(jsonl_path)
-                        })
+                        message = SessionMessage(
+                            'user' if msg_type == 'user' else 'assistant',
+                            content[:PREVIEW_CHARS],
+                            current_line,
+                            timestamp,
+                            source_id,
+                        )
+                        messages.append(message)
+                        if on_message is not None:
+                            on_message(message)
 
                 # Extract tool calls from assistant messages (nested in content)
                 if msg_type == 'assistant':
@@ -310,19 +689,84 @@ def extract_new_entries(jsonl_path, last_line_count):
                                                     else:
                                                         files_touched.add(match)
 
-            except:
+            except Exception:
                 continue
 
-    return messages, tool_calls, list(files_touched), current_line
+    return messages, tool_calls, list(files_touched), offset, current_line
+
+def scan_session_file(scan_task, on_message=None):
+    """Scan one changed session file and build its new state entry.
+
+    Takes a (jsonl_path, source_id, start_offset, start_line, stat) tuple so
+    it can be mapped over a process pool as well as called inline.
+    on_message is passed on to extract_new_entries().
+    """
+    jsonl_path, source_id, start_offset, start_line, stat = scan_task
+    messages, tool_calls, files_touched, end_offset, current_line = extract_new_entries(
+        jsonl_path, source_id, start_offset, start_line, on_message
+    )
+    file_state = build_file_state(jsonl_path, stat, end_offset, current_line)
+    return messages, tool_calls, sorted(files_touched), current_line - start_line, file_state
+
+def scan_session_files(scan_tasks, jobs):
+    """Scan changed session files, in parallel when jobs > 1.
+
+    Results are yielded in task order either way, so merging them gives the
+    same transcript as a serial scan, and each can be consumed as it lands.
+    """
+    if jobs <= 1 or len(scan_tasks) <= 1:
+        for task in scan_tasks:
+            yield scan_session_file(task)
+        return
+
+    # Imported here to keep it off the --budget-ms startup path
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(jobs, len(scan_tasks))
+    chunksize = max(1, len(scan_tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(scan_session_file, scan_tasks, chunksize=chunksize)
+
+def parse_jobs_arg(argv):
+    """Parse --jobs N (0 = one worker per CPU). Defaults to a serial scan."""
+    if '--jobs' not in argv:
+        return 1
+    try:
+        jobs = int(argv[argv.index('--jobs') + 1])
+    except (IndexError, ValueError):
+        print("   ⚠️  --jobs requires a number, scanning serially")
+        return 1
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def new_recovery_totals():
+    """Running aggregates for the header sections of a recovery run."""
+    return {
+        'messages': 0,
+        'sources': 0,
+        'tool_calls': 0,
+        'tool_counts': Counter(),
+        'files_touched': set(),
+    }
+
+
+def add_to_totals(totals, messages, tool_calls, files_touched):
+    """Fold one session file's scan results into the running aggregates."""
+    totals['messages'] += len(messages)
+    if messages:
+        totals['sources'] += 1
+    totals['tool_calls'] += len(tool_calls)
+    totals['tool_counts'].update(tc['name'] for tc in tool_calls)
+    totals['files_touched'].update(files_touched)
 
 
-def build_session_profile(tool_calls, files_touched, messages):
+def build_session_profile(totals):
     """Build a session profile from tool usage statistics."""
-    if not tool_calls and not messages:
+    if not totals['tool_calls'] and not totals['messages']:
         return None
 
-    tool_counts = Counter(tc['name'] for tc in tool_calls)
-    total_tools = len(tool_calls)
+    tool_counts = totals['tool_counts']
+    total_tools = totals['tool_calls']
 
     # Categorize tools
     edit_tools = tool_counts.get('Edit', 0) + tool_counts.get('Write', 0) + tool_counts.get('NotebookEdit', 0)
@@ -352,18 +796,44 @@ def build_session_profile(tool_calls, files_touched, messages):
 
     return {
         'total_tools': total_tools,
-        'total_messages': len(messages),
+        'total_messages': totals['messages'],
         'character': character,
         'character_emoji': character_emoji,
         'tool_counts': dict(tool_counts),
-        'files_touched': len(files_touched),
+        'files_touched': len(totals['files_touched']),
         'edit_percentage': round(edit_tools / max(total_tools, 1) * 100),
         'top_tools': tool_counts.most_common(5)
     }
 
-def export_new_content_to_transcript(all_new_messages, all_tool_calls, all_files_touched, findings):
-    """Export new content to transcript with progressive disclosure format."""
-    if not all_new_messages and not all_tool_calls:
+def write_lines(f, lines):
+    """Write lines to a text file, each followed by a newline."""
+    for line in lines:
+        f.write(line)
+        f.write('\n')
+
+
+def spool_transcript_messages(spool, source, messages):
+    """Append one source's messages to the Full Transcript spool.
+
+    Each block starts with its separating blank line, so the finished
+    document has no trailing blank line after the last message.
+    """
+    if not messages:
+        return
+    spool.write(f"\n### Source: {Path(source).parent.name}\n")
+    for msg in messages:
+        role_emoji = "👤" if msg.type == 'user' else "🤖"
+        role_name = "User" if msg.type == 'user' else "Assistant"
+        spool.write(f"\n#### {role_emoji} {role_name}\n\n{msg.content}\n\n---\n")
+
+
+def export_new_content_to_transcript(transcript_spool, totals, findings):
+    """Export new content to transcript with progressive disclosure format.
+
+    Header sections come from the running totals; the per-source transcript
+    was spooled during the scan and is copied in after them.
+    """
+    if not totals['messages'] and not totals['tool_calls']:
         return None
 
     # Create transcript directory
@@ -374,179 +844,122 @@ def export_new_content_to_transcript(all_new_messages, all_tool_calls, all_files
     ts = datetime.now().strftime('%Y%m%d-%H%M%S')
     output_file = transcript_dir / f"auto-recovery-{ts}.md"
 
-    # Build session profile
-    profile = build_session_profile(all_tool_calls, all_files_touched, all_new_messages)
-
-    # Group messages by source
-    by_source = {}
-    for msg in all_new_messages:
-        source = msg['source']
-        if source not in by_source:
-            by_source[source] = []
-        by_source[source].append(msg)
-
-    # === Generate markdown with progressive disclosure ===
-    lines = [
-        f"# Auto-Recovered Transcript",
-        f"",
-        f"- **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"- **Sources:** {len(by_source)} session file(s)",
-        f"- **Total Messages:** {len(all_new_messages)}",
-        f"",
-    ]
+    profile = build_session_profile(totals)
+    all_files_touched = totals['files_touched']
 
-    # === Level 0: Session Profile ===
-    if profile:
-        lines.extend([
-            f"## Session Profile",
+    with open(output_file, 'w', encoding='utf-8') as out:
+        # === Generate markdown with progressive disclosure ===
+        write_lines(out, [
+            f"# Auto-Recovered Transcript",
             f"",
-            f"| Metric | Value |",
-            f"|--------|-------|",
-            f"| Character | {profile['character_emoji']} {profile['character']} |",
-            f"| Tool Calls | {profile['total_tools']} |",
-            f"| Messages | {profile['total_messages']} |",
-            f"| Files Touched | {profile['files_touched']} |",
-            f"| Edit Ratio | {profile['edit_percentage']}% |",
+            f"- **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"- **Sources:** {totals['sources']} session file(s)",
+            f"- **Total Messages:** {totals['messages']}",
             f"",
         ])
-        if profile['top_tools']:
-            lines.append("**Top Tools:** " + ", ".join(f"{t[0]} ({t[1]})" for t in profile['top_tools']))
-            lines.append("")
-
-    # === Level 1: Files Touched ===
-    if all_files_touched:
-        lines.extend([
-            f"## Files Touched ({len(all_files_touched)})",
-            f"",
-        ])
-        # Group by directory
-        by_dir = {}
-        for f in sorted(all_files_touched):
-            dir_name = str(Path(f).parent)
-            if dir_name not in by_dir:
-                by_dir[dir_name] = []
-            by_dir[dir_name].append(Path(f).name)
-
-        for dir_name, files in sorted(by_dir.items()):
-            lines.append(f"- `{dir_name}/`")
-            for fname in files:
-                lines.append(f"  - {fname}")
-        lines.append("")
-
-    # === Level 2: Action Checklist ===
-    if findings:
-        high_priority = [f for f in findings if f['priority'] == 1]
-        medium_priority = [f for f in findings if f['priority'] == 2]
-
-        lines.extend([
-            f"## Recovery Checklist",
-            f"",
-        ])
-
-        if high_priority:
-            lines.append("### High Priority")
-            lines.append("")
-            for f in high_priority:
-                lines.append(f"- [ ] **[{f['type']}]** {f['excerpt'][:100]}...")
-            lines.append("")
-
-        if medium_priority:
-            lines.append("### Review if Relevant")
-            lines.append("")
-            for f in medium_priority:
-                lines.append(f"- [ ] [{f['type']}] {f['excerpt'][:80]}...")
-            lines.append("")
-
-    lines.append("---")
-    lines.append("")
-
-    # === Level 3: Full Transcript ===
-    lines.extend([
-        f"## Full Transcript",
-        f"",
-    ])
 
-    for source, messages in by_source.items():
-        source_name = Path(source).parent.name
-        lines.append(f"### Source: {source_name}")
-        lines.append(f"")
-
-        for msg in messages:
-            role_emoji = "👤" if msg['type'] == 'user' else "🤖"
-            role_name = "User" if msg['type'] == 'user' else "Assistant"
-            lines.append(f"#### {role_emoji} {role_name}")
-            lines.append(f"")
-            lines.append(msg['content'])
-            lines.append(f"")
-            lines.append(f"---")
-            lines.append(f"")
-
-    # Write file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
+        # === Level 0: Session Profile ===
+        if profile:
+            write_lines(out, [
+                f"## Session Profile",
+                f"",
+                f"| Metric | Value |",
+                f"|--------|-------|",
+                f"| Character | {profile['character_emoji']} {profile['character']} |",
+                f"| Tool Calls | {profile['total_tools']} |",
+                f"| Messages | {profile['total_messages']} |",
+                f"| Files Touched | {profile['files_touched']} |",
+                f"| Edit Ratio | {profile['edit_percentage']}% |",
+                f"",
+            ])
+            if profile['top_tools']:
+                write_lines(out, [
+                    "**Top Tools:** " + ", ".join(f"{t[0]} ({t[1]})" for t in profile['top_tools']),
+                    "",
+                ])
+
+        # === Level 1: Files Touched ===
+        if all_files_touched:
+            write_lines(out, [
+                f"## Files Touched ({len(all_files_touched)})",
+                f"",
+            ])
+            # Group by directory
+            by_dir = {}
+            for f in sorted(all_files_touched):
+                dir_name = str(Path(f).parent)
+                if dir_name not in by_dir:
+                    by_dir[dir_name] = []
+                by_dir[dir_name].append(Path(f).name)
+
+            for dir_name, files in sorted(by_dir.items()):
+                write_lines(out, [f"- `{dir_name}/`"])
+                write_lines(out, (f"  - {fname}" for fname in files))
+            write_lines(out, [""])
+
+        # === Level 2: Action Checklist ===
+        if findings:
+            high_priority = [f for f in findings if f['priority'] == 1]
+            medium_priority = [f for f in findings if f['priority'] == 2]
+
+            write_lines(out, [
+                f"## Recovery Checklist",
+                f"",
+            ])
+
+            if high_priority:
+                write_lines(out, ["### High Priority", ""])
+                for f in high_priority:
+                    write_lines(out, [f"- [ ] **[{f['type']}]** {f['excerpt'][:100]}..."])
+                write_lines(out, [""])
+
+            if medium_priority:
+                write_lines(out, ["### Review if Relevant", ""])
+                for f in medium_priority:
+                    write_lines(out, [f"- [ ] [{f['type']}] {f['excerpt'][:80]}..."])
+                write_lines(out, [""])
+
+        write_lines(out, ["---", ""])
+
+        # === Level 3: Full Transcript ===
+        write_lines(out, [f"## Full Transcript"])
+        transcript_spool.seek(0)
+        shutil.copyfileobj(transcript_spool, out)
 
     return output_file
 
 
-def analyze_for_undocumented(messages):
-    """Analyze messages for potentially undocumented insights with expanded triggers."""
-    findings = []
+def plan_scan_tasks(harness_folders, processed_files):
+    """Build scan tasks for the session files that changed since their stored state.
 
-    # Original conversational keywords
-    decision_keywords = ['decided', 'decision', 'agreed', 'will use', 'chosen', 'selected', 'approved', 'going with', 'settled on']
-    learning_keywords = ['learned', 'discovered', 'found that', 'realized', 'insight', 'key finding', 'turns out', 'interesting']
-    research_keywords = ['patterns', 'extracted', 'research', 'analyzed', 'methodology', 'architecture']
-    action_keywords = ['todo', 'next step', 'action item', 'should create', 'need to', 'must', 'will implement']
-
-    # Technical keywords (new)
-    code_keywords = ['implement', 'refactor', 'created', 'modified', 'deleted', 'updated', 'added function', 'added method']
-    error_keywords = ['error', 'failed', 'exception', 'bug', 'fix', 'broken', 'issue', 'problem', 'crash']
-    config_keywords = ['configured', 'setup', 'installed', 'enabled', 'disabled', 'setting']
-
-    # Priority levels for sorting
-    high_priority = [
-        (decision_keywords, 'DECISION', 1),
-        (error_keywords, 'ERROR', 1),
-        (action_keywords, 'ACTION', 1),
-    ]
-    medium_priority = [
-        (learning_keywords, 'LEARNING', 2),
-        (research_keywords, 'RESEARCH', 2),
-        (code_keywords, 'CODE', 2),
-        (config_keywords, 'CONFIG', 2),
-    ]
-
-    all_checks = high_priority + medium_priority
-
-    for msg in messages:
-        content_lower = msg['content'].lower()
-
-        for kw_list, finding_type, priority in all_checks:
-            if any(kw in content_lower for kw in kw_list):
-                findings.append({
-                    'type': finding_type,
-                    'priority': priority,
-                    'excerpt': msg['content'][:500],  # Increased for full context
-                    'line': msg['line'],
-                    'source': msg['source'],
-                    'timestamp': msg['timestamp']
-                })
-                break  # Only one finding per message
-
-    # Deduplicate
-    seen = set()
-    unique_findings = []
-    for f in findings:
-        key = f['excerpt'][:50]
-        if key not in seen:
-            seen.add(key)
-            unique_findings.append(f)
-
-    # Sort by priority (high first), then limit
-    unique_findings.sort(key=lambda x: x['priority'])
-    return unique_findings[:20]  # Increased limit to 20
-
-def main():
+    Returns (scan_tasks, scan_folders). Untouched files are skipped on their
+    fingerprint without being opened.
+    """
+    scan_tasks = []
+    scan_folders = []
+    for folder in harness_folders:
+        session_files = find_session_files(folder)
+        for jsonl_path in session_files:
+            scan = plan_file_scan(jsonl_path, processed_files.get(str(jsonl_path)))
+            if scan is not None:
+                # Ids are assigned here so worker processes don't need the table
+                scan_tasks.append((jsonl_path, intern_source(jsonl_path), *scan))
+                scan_folders.append(folder)
+    return scan_tasks, scan_folders
+
+
+def print_high_priority_findings(high_priority):
+    """Print high-priority findings with their full excerpts."""
+    # HIGH PRIORITY: Print FULL content so Claude receives it
+    print("\n🔴 HIGH PRIORITY ITEMS (full content for context):\n")
+    for i, f in enumerate(high_priority[:10], 1):  # Top 10 high priority with full content
+        print(f"   {i}. [{f['type']}]")
+        print(f"      {f['excerpt']}")  # FULL excerpt, not truncated
+        print()
+
+
+def run_recovery(jobs):
+    """Full recovery: scan, export the transcript, print the checklist, save state."""
     print("🔍 Harness Session Recovery Check...")
     print(f"   Scanning for ALL Harness-related project folders...")
 
@@ -561,53 +974,50 @@ def main():
     harness_folders = find_all_harness_folders()
     print(f"   Found {len(harness_folders)} Harness-related folder(s)")
 
-    all_new_messages = []
-    all_tool_calls = []
-    all_files_touched = []
+    totals = new_recovery_totals()
+    tracker = new_findings_tracker()
     total_new_entries = 0
 
-    for folder in harness_folders:
-        session_files = find_session_files(folder)
-        for jsonl_path in session_files:
-            filepath_key = str(jsonl_path)
-            last_line = processed_files.get(filepath_key, 0)
+    scan_tasks, scan_folders = plan_scan_tasks(harness_folders, processed_files)
+    results = scan_session_files(scan_tasks, jobs)
 
-            # Use new extraction function that captures tool calls and files
-            messages, tool_calls, files_touched, current_line = extract_new_entries(jsonl_path, last_line)
-            new_count = current_line - last_line
+    # Each file's messages are analyzed and spooled as its result arrives,
+    # so only one file's worth of messages is held at a time
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as transcript_spool:
+        for folder, task, result in zip(scan_folders, scan_tasks, results):
+            jsonl_path = task[0]
+            messages, tool_calls, files_touched, new_count, file_state = result
 
             if new_count > 0:
                 print(f"   📁 {folder.name}")
                 print(f"      └── {jsonl_path.name}: {new_count} new entries")
-                all_new_messages.extend(messages)
-                all_tool_calls.extend(tool_calls)
-                all_files_touched.extend(files_touched)
+                add_to_totals(totals, messages, tool_calls, files_touched)
+                analyze_for_undocumented(messages, tracker)
+                spool_transcript_messages(transcript_spool, jsonl_path, messages)
                 total_new_entries += new_count
 
             # Update processed state
-            processed_files[filepath_key] = current_line
+            processed_files[str(jsonl_path)] = file_state
 
-    if total_new_entries == 0:
-        print("   ✅ No new content since last check")
-        save_recovery_state({'processed_files': processed_files})
-        return
+        if total_new_entries == 0:
+            print("   ✅ No new content since last check")
+            save_recovery_state({'processed_files': processed_files})
+            return
 
-    print(f"\n   Total: {total_new_entries} new entries across all sessions")
+        print(f"\n   Total: {total_new_entries} new entries across all sessions")
 
-    # Analyze for undocumented content FIRST (needed for export)
-    findings = analyze_for_undocumented(all_new_messages)
+        findings = top_findings(tracker)
 
-    # Build session profile for console output
-    profile = build_session_profile(all_tool_calls, all_files_touched, all_new_messages)
-    if profile:
-        print(f"   Session: {profile['character_emoji']} {profile['character']}")
-        print(f"   Tools: {profile['total_tools']} | Files: {profile['files_touched']} | Messages: {profile['total_messages']}")
+        # Build session profile for console output
+        profile = build_session_profile(totals)
+        if profile:
+            print(f"   Session: {profile['character_emoji']} {profile['character']}")
+            print(f"   Tools: {profile['total_tools']} | Files: {profile['files_touched']} | Messages: {profile['total_messages']}")
 
-    # Auto-export new content to transcript with full progressive disclosure
-    all_files_unique = list(set(all_files_touched))
-    export_file = export_new_content_to_transcript(all_new_messages, all_tool_calls, all_files_unique, findings)
-    if export_file:
-        print(f"\n   📝 Auto-exported to: {export_file}")
+        # Auto-export new content to transcript with full progressive disclosure
+        export_file = export_new_content_to_transcript(transcript_spool, totals, findings)
+        if export_file:
+            print(f"\n   📝 Auto-exported to: {export_file}")
 
     # Print findings summary to console - FULL CONTENT for high priority
     if findings:
@@ -616,13 +1026,8 @@ def main():
 
         print(f"\n⚠️  RECOVERY CHECKLIST ({len(findings)} items, {len(high_priority)} high priority):")
 
-        # HIGH PRIORITY: Print FULL content so Claude receives it
         if high_priority:
-            print("\n🔴 HIGH PRIORITY ITEMS (full content for context):\n")
-            for i, f in enumerate(high_priority[:10], 1):  # Top 10 high priority with full content
-                print(f"   {i}. [{f['type']}]")
-                print(f"      {f['excerpt']}")  # FULL excerpt, not truncated
-                print()
+            print_high_priority_findings(high_priority)
 
         # Medium priority: Just summaries
         if medium_priority:
@@ -642,5 +1047,176 @@ def main():
     # Run git health check
     check_git_health()
 
+
+class BudgetExceeded(BaseException):
+    """Raised from SIGALRM when the --budget-ms deadline passes.
+
+    A BaseException so the scan's per-line `except Exception` can't swallow it.
+    """
+
+
+def parse_budget_arg(argv):
+    """Parse --budget-ms N. Returns None when no budget was given."""
+    if '--budget-ms' not in argv:
+        return None
+    try:
+        budget_ms = int(argv[argv.index('--budget-ms') + 1])
+    except (IndexError, ValueError):
+        print("   ⚠️  --budget-ms requires a number, running without a budget")
+        return None
+    return max(budget_ms, 1)
+
+
+def acquire_recovery_lock():
+    """Take the recovery lock without waiting; returns the open lock file, or None if held.
+
+    Full recovery runs (foreground or deferred) hold it so concurrent sessions
+    never scan and save state at the same time. flock is released by the
+    kernel when its holder exits, so a crashed run can't leave a stale lock.
+    """
+    lock_path = RECOVERY_LOCK_PATH
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(lock_path, 'a+')
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    # Owner pid, for whoever wonders what holds the lock
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def spawn_deferred_worker(jobs):
+    """Start a detached run of this script that completes the deferred work."""
+    args = [sys.executable, os.path.abspath(__file__), '--complete-deferred', '--jobs', str(jobs)]
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run_deferred_recovery(jobs):
+    """Deferred worker entry point: full recovery under the lock, output to the log."""
+    lock_file = acquire_recovery_lock()
+    if lock_file is None:
+        return  # Another run is already recording the new content
+    try:
+        with open(RECOVERY_LOG_PATH, 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            run_recovery(jobs)
+    finally:
+        lock_file.close()
+
+
+def preview_recovery(budget_ms, started):
+    """Print the high-priority checklist for whatever can be scanned within the budget.
+
+    Nothing is exported or saved here: the deferred worker rescans from the
+    stored state. SIGALRM interrupts the scan at the deadline (minus a
+    reserve for printing), wherever it is, so the budget is a hard cap.
+    Messages are analyzed as they are read, so an interrupted file still
+    contributes the findings from the part that was scanned.
+    """
+    print(f"🔍 Harness Session Recovery Check (preview, {budget_ms} ms budget)...")
+
+    tracker = new_findings_tracker()
+    progress = {'planned': None, 'scanned': 0, 'messages': 0}
+    # 'due' records a deadline that fired while a tracker update was running
+    armed = {'on': True, 'due': False}
+
+    def on_deadline(signum, frame):
+        if armed['on']:
+            raise BudgetExceeded()
+        armed['due'] = True
+
+    def analyze(message):
+        # The tracker is never left half-updated: the deadline waits for it
+        armed['on'] = False
+        analyze_for_undocumented((message,), tracker)
+        progress['messages'] += 1
+        armed['on'] = True
+        if armed['due']:
+            raise BudgetExceeded()
+
+    reserve_ms = min(BUDGET_PRINT_RESERVE_MS, budget_ms // 4)
+    remaining_s = (budget_ms - reserve_ms) / 1000 - (time.monotonic() - started)
+    timed_out = remaining_s <= 0
+    if not timed_out:
+        previous_handler = signal.signal(signal.SIGALRM, on_deadline)
+        signal.setitimer(signal.ITIMER_REAL, remaining_s)
+        try:
+            try:
+                processed_files = load_recovery_state().get('processed_files', {})
+            except ValueError:
+                processed_files = {}  # Unreadable state - preview as if there were none
+            scan_tasks, _ = plan_scan_tasks(find_all_harness_folders(), processed_files)
+            progress['planned'] = len(scan_tasks)
+            for task in scan_tasks:
+                scan_session_file(task, analyze)
+                progress['scanned'] += 1
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            armed['on'] = False
+        except BudgetExceeded:
+            # A deadline landing just after the last file still finished the scan
+            timed_out = progress['scanned'] != progress['planned']
+        finally:
+            # Whatever ended the scan, the timer and handler must not outlive it
+            armed['on'] = False
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    elapsed_ms = round((time.monotonic() - started) * 1000)
+    if progress['planned'] == 0:
+        print("   ✅ No new content since last check")
+    elif timed_out:
+        planned = progress['planned'] if progress['planned'] is not None else '?'
+        print(f"   ⏱️  Budget reached after {progress['scanned']} of {planned} changed session file(s)"
+              f" and {progress['messages']} new message(s)")
+    else:
+        print(f"   Previewed {progress['scanned']} changed session file(s) in {elapsed_ms} ms")
+
+    high_priority = [f for f in top_findings(tracker) if f['priority'] == 1]
+    if high_priority:
+        print_high_priority_findings(high_priority)
+    elif progress['messages']:
+        print("   ✅ No high-priority items in the previewed content")
+
+    print("   ⏳ Transcript export, state save and git health check continue in the background")
+    print(f"      (log: {RECOVERY_LOG_PATH})")
+
+
+def main():
+    started = time.monotonic()
+    jobs = parse_jobs_arg(sys.argv)
+
+    if '--complete-deferred' in sys.argv:
+        run_deferred_recovery(jobs)
+        return
+
+    budget_ms = parse_budget_arg(sys.argv)
+    if budget_ms is not None and hasattr(signal, 'setitimer'):
+        # Started first so the deferred work overlaps the preview
+        spawn_deferred_worker(jobs)
+        preview_recovery(budget_ms, started)
+        return
+
+    lock_file = acquire_recovery_lock()
+    if lock_file is None:
+        print("🔍 Harness Session Recovery Check...")
+        print("   ⏳ Another recovery run is in progress - it will record the new content")
+        return
+    try:
+        run_recovery(jobs)
+    finally:
+        lock_file.close()
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Undocumented-insight detection for recovered session messages.
+
+Used by session-recovery.py. Each message is classified by the first keyword
+check (in priority order) that has a keyword occurring in its lowercased
+text. All keywords are found in one scan of the text: with pyahocorasick's
+automaton when it is installed, otherwise with one compiled `re` alternation
+factored into a keyword trie, which benchmarks faster than testing each
+keyword with `in` (see benchmark-findings.py).
+
+Only the best MAX_FINDINGS findings are kept, in a bounded heap ranked by
+priority and then recency. Reworded repeats are collapsed by comparing
+MinHash signatures of their word sets, keeping the newer one.
+"""
+
+import heapq
+import re
+import zlib
+
+# Optional multi-keyword automaton
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Keyword checks in priority order - the first match decides a message's finding
+FINDING_CHECKS = [
+    # High priority
+    (['decided', 'decision', 'agreed', 'will use', 'chosen', 'selected', 'approved', 'going with', 'settled on'], 'DECISION', 1),
+    (['error', 'failed', 'exception', 'bug', 'fix', 'broken', 'issue', 'problem', 'crash'], 'ERROR', 1),
+    (['todo', 'next step', 'action item', 'should create', 'need to', 'must', 'will implement'], 'ACTION', 1),
+    # Medium priority
+    (['learned', 'discovered', 'found that', 'realized', 'insight', 'key finding', 'turns out', 'interesting'], 'LEARNING', 2),
+    (['patterns', 'extracted', 'research', 'analyzed', 'methodology', 'architecture'], 'RESEARCH', 2),
+    (['implement', 'refactor', 'created', 'modified', 'deleted', 'updated', 'added function', 'added method'], 'CODE', 2),
+    (['configured', 'setup', 'installed', 'enabled', 'disabled', 'setting'], 'CONFIG', 2),
+]
+
+MAX_FINDINGS = 20
+
+# Near-duplicate detection: bottom-k MinHash over each excerpt's word set
+SIGNATURE_SIZE = 64
+NEAR_DUPLICATE_JACCARD = 0.6
+_WORD = re.compile(r'\w+')
+
+
+# Matcher implementations for build_matcher(), fastest first
+MATCHER_METHODS = ('automaton', 'regex', 'keywords')
+
+
+def keyword_trie_pattern(keywords):
+    """Regex source matching any keyword, longest first at each position.
+
+    The alternation is factored into a trie, so each position is tried one
+    character at a time rather than once per keyword.
+    """
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # End of a keyword
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ending here makes the rest optional (greedy, so longer ones win)
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+def build_matcher(checks, method=None):
+    """Return match(text_lower) -> index of the first check that matches, or None.
+
+    method is one of MATCHER_METHODS; by default the automaton if
+    pyahocorasick is installed, else the regex.
+    """
+    if method is None:
+        method = 'automaton' if HAS_AHOCORASICK else 'regex'
+
+    if method == 'keywords':
+        keyword_lists = [kw_list for kw_list, _, _ in checks]
+
+        def match(text_lower):
+            for index, kw_list in enumerate(keyword_lists):
+                if any(kw in text_lower for kw in kw_list):
+                    return index
+            return None
+
+        return match
+
+    if method == 'regex':
+        # Each keyword maps to the earliest check listing it or any keyword
+        # it starts with - those match at the same position but lose to it
+        first_check = {}
+        for index, (kw_list, _, _) in enumerate(checks):
+            for kw in kw_list:
+                first_check.setdefault(kw, index)
+        check_of = {
+            kw: min(index for prefix, index in first_check.items() if kw.startswith(prefix))
+            for kw in first_check
+        }
+        search = re.compile(keyword_trie_pattern(first_check)).search
+
+        def match(text_lower):
+            best = None
+            found = search(text_lower)
+            while found:
+                index = check_of[found.group()]
+                if best is None or index < best:
+                    best = index
+                    if best == 0:
+                        break  # Nothing can beat the first check
+                # Resume one character on, so overlapping keywords are found too
+                found = search(text_lower, found.start() + 1)
+            return best
+
+        return match
+
+    # Each keyword maps to the earliest check that lists it
+    automaton = ahocorasick.Automaton()
+    for index in reversed(range(len(checks))):
+        for kw in checks[index][0]:
+            automaton.add_word(kw, index)
+    automaton.make_automaton()
+
+    def match(text_lower):
+        best = None
+        for _, index in automaton.iter(text_lower):
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break  # Nothing can beat the first check
+        return best
+
+    return match
+
+
+match_finding = build_matcher(FINDING_CHECKS)
+
+
+def word_signature(text):
+    """Bottom-k MinHash signature of the set of distinct words in text.
+
+    Single words rather than shingles (word n-grams) on purpose: a reworded
+    repeat keeps most of its words but few of its word sequences.
+    """
+    words = set(_WORD.findall(text.lower()))
+    hashes = {zlib.crc32(word.encode('utf-8')) for word in words}
+    return frozenset(heapq.nsmallest(SIGNATURE_SIZE, hashes))
+
+
+def estimate_jaccard(sig_a, sig_b):
+    """Estimate the Jaccard similarity of two word sets from their signatures."""
+    union = heapq.nsmallest(SIGNATURE_SIZE, sig_a | sig_b)
+    if not union:
+        return 1.0  # Neither has any words
+    shared = sum(1 for h in union if h in sig_a and h in sig_b)
+    return shared / len(union)
+
+
+def is_near_duplicate(sig_a, sig_b):
+    """True if two signatures' word sets are at least NEAR_DUPLICATE_JACCARD similar."""
+    # The estimate can't exceed the overlap over the sampled union size,
+    # which rules out most pairs without the nsmallest() call
+    overlap = len(sig_a & sig_b)
+    sampled = min(SIGNATURE_SIZE, len(sig_a) + len(sig_b) - overlap)
+    if sampled and overlap < NEAR_DUPLICATE_JACCARD * sampled:
+        return False
+    return estimate_jaccard(sig_a, sig_b) >= NEAR_DUPLICATE_JACCARD
+
+
+def new_findings_tracker(limit=MAX_FINDINGS):
+    """Incremental findings state: a bounded min-heap with the worst finding on top.
+
+    Heap entries are (-priority, seq, signature, finding); seq counts findings
+    in message order, so it breaks ties in favour of more recent ones.
+    """
+    return {'heap': [], 'seq': 0, 'limit': limit}
+
+
+def analyze_for_undocumented(messages, tracker):
+    """Analyze a batch of messages for potentially undocumented insights.
+
+    Findings are folded into the tracker so batches can be analyzed as each
+    session file is scanned; top_findings() gives the combined result.
+    """
+    heap = tracker['heap']
+    limit = tracker['limit']
+
+    for msg in messages:
+        index = match_finding(msg.content.lower())
+        if index is None:
+            continue  # Only one finding per message, if any
+
+        _, finding_type, priority = FINDING_CHECKS[index]
+        seq = tracker['seq']
+        tracker['seq'] += 1
+        rank = (-priority, seq)
+        if len(heap) >= limit and rank < heap[0][:2]:
+            continue  # Can't make the cut
+
+        excerpt = msg.content[:500]  # Increased for full context
+        signature = word_signature(excerpt)
+
+        # Collapse near-duplicates into whichever ranks highest
+        duplicates = [entry for entry in heap if is_near_duplicate(signature, entry[2])]
+        if duplicates:
+            if any(rank < entry[:2] for entry in duplicates):
+                continue
+            heap[:] = [entry for entry in heap if entry not in duplicates]
+            heapq.heapify(heap)
+
+        heapq.heappush(heap, (rank[0], seq, signature, {
+            'type': finding_type,
+            'priority': priority,
+            'excerpt': excerpt,
+            'line': msg.line,
+            'source': msg.source,
+            'timestamp': msg.timestamp
+        }))
+        if len(heap) > limit:
+            heapq.heappop(heap)
+
+
+def top_findings(tracker):
+    """Return the kept findings, high priority first, in message order within each."""
+    return [entry[3] for entry in sorted(tracker['heap'], key=lambda e: (-e[0], e[1]))]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared ingestion layer for Claude Code session JSONL files.
+
+Used by session-recovery.py, export-session.py and analyze-session.py.
+Session files are dominated by tool output, so lines are checked as raw
+bytes before any JSON decoding:
+
+- A prefilter on the record "type" skips irrelevant records undecoded.
+- orjson is used for decoding when it is installed, json otherwise.
+- Oversized records that only carry tool results can be skipped while
+  reading, in fixed-size chunks, so they are never held in memory whole.
+
+Recovered messages are kept as compact SessionMessage records holding a
+preview of their text and an interned id of their source file.
+
+Structural tokens like "type":"user" can't occur inside a JSON string value
+(its quotes would be escaped), so the byte checks never miss a record.
+"""
+
+import json
+import re
+
+# Optional faster JSON backend
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Characters of message text kept in memory per SessionMessage
+PREVIEW_CHARS = 500
+
+# Lines longer than this are read in chunks when tool results may be skipped
+MAX_LINE_BYTES = 256 * 1024
+CHUNK_BYTES = 1024 * 1024
+
+_TOOL_RESULT_ITEM = re.compile(rb'"type"\s*:\s*"tool_result"')
+_TEXT_ITEM = re.compile(rb'"type"\s*:\s*"text"')
+# Long enough to hold either token when it straddles two chunks
+_TOKEN_OVERLAP = 64
+
+
+def type_prefilter(types):
+    """Compile a byte pattern matching lines that may hold one of the record types."""
+    alternatives = b'|'.join(re.escape(t.encode('utf-8')) for t in types)
+    return re.compile(rb'"type"\s*:\s*"(?:' + alternatives + rb')"')
+
+
+def loads(raw):
+    """Decode one JSON line (bytes or str). Raises ValueError if it is invalid."""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. lone surrogates or huge ints - let json decide
+    return json.loads(raw)
+
+
+def is_tool_result_only(raw):
+    """True for records that carry tool results but no text items."""
+    return _TOOL_RESULT_ITEM.search(raw) is not None and _TEXT_ITEM.search(raw) is None
+
+
+def iter_lines(f, skip_tool_results=False):
+    """Yield (raw_line, size) for each line of a session file opened in 'rb'.
+
+    With skip_tool_results, lines over MAX_LINE_BYTES are scanned in chunks
+    first: complete lines that only carry tool results are yielded as
+    (None, size) without ever being read into memory whole. Any other
+    oversized line is re-read in full from its start offset.
+    """
+    while True:
+        raw = f.readline(MAX_LINE_BYTES)
+        if not raw:
+            return
+        if raw.endswith(b'\n') or len(raw) < MAX_LINE_BYTES:
+            yield raw, len(raw)
+            continue
+        if not skip_tool_results:
+            raw += f.readline()
+            yield raw, len(raw)
+            continue
+
+        start = f.tell() - len(raw)
+        size = len(raw)
+        has_tool_result = _TOOL_RESULT_ITEM.search(raw) is not None
+        has_text = _TEXT_ITEM.search(raw) is not None
+        tail = raw[-_TOKEN_OVERLAP:]
+        complete = False
+        while True:
+            chunk = f.readline(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            window = tail + chunk
+            has_tool_result = has_tool_result or _TOOL_RESULT_ITEM.search(window) is not None
+            has_text = has_text or _TEXT_ITEM.search(window) is not None
+            tail = chunk[-_TOKEN_OVERLAP:]
+            if chunk.endswith(b'\n'):
+                complete = True
+                break
+
+        if complete and has_tool_result and not has_text:
+            yield None, size
+            continue
+
+        f.seek(start)
+        raw = f.readline()
+        yield raw, len(raw)
+
+
+def iter_records(path, types, skip_tool_results=False):
+    """Yield decoded records of the given top-level types from a session file.
+
+    Lines that fail to decode are skipped. With skip_tool_results, records
+    that only carry tool results are skipped without being decoded.
+    """
+    prefilter = type_prefilter(types)
+    with open(path, 'rb') as f:
+        for raw, _ in iter_lines(f, skip_tool_results):
+            if raw is None or not prefilter.search(raw):
+                continue
+            if skip_tool_results and is_tool_result_only(raw):
+                continue
+            try:
+                entry = loads(raw)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get('type') in types:
+                yield entry
+
+
+def message_text(entry):
+    """Return the text of a user/assistant record, joining its text items."""
+    content = entry.get('message', {}).get('content', '')
+    if isinstance(content, list):
+        text_parts = []
+        for item in content:
+            if isinstance(item, dict) and item.get('type') == 'text':
+                text_parts.append(item.get('text', ''))
+        content = ' '.join(text_parts)
+    return content
+
+
+# Interned session file paths, so messages carry a small id instead of a path
+_source_paths = []
+_source_ids = {}
+
+
+def intern_source(path):
+    """Return the id for a session file path, registering it on first use."""
+    key = str(path)
+    source_id = _source_ids.get(key)
+    if source_id is None:
+        source_id = len(_source_paths)
+        _source_paths.append(key)
+        _source_ids[key] = source_id
+    return source_id
+
+
+def source_path(source_id):
+    """Return the session file path registered under source_id."""
+    return _source_paths[source_id]
+
+
+class SessionMessage:
+    """A recovered user/assistant message.
+
+    Keeps a PREVIEW_CHARS preview of the text and the line it came from.
+    Source ids are assigned with intern_source() in the process that reads
+    .source.
+    """
+
+    __slots__ = ('type', 'content', 'line', 'timestamp', 'source_id')
+
+    def __init__(self, type, content, line, timestamp, source_id):
+        self.type = type
+        self.content = content
+        self.line = line
+        self.timestamp = timestamp
+        self.source_id = source_id
+
+    # Pickled as a plain tuple when results come back from worker processes
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def source(self):
+        return source_path(self.source_id)
@@ -11,14 +11,16 @@ This script checks staged changes against append-only rules:
 
 Usage:
     python3 validate-append-only.py           # Check staged changes
-    python3 validate-append-only.py --audit   # Audit full git history
+    python3 validate-append-only.py --audit   # Audit git history (new commits only)
 """
 
-import subprocess
 import sys
 import re
 from pathlib import Path
 
+from config_cache import get_cache_dir
+from history_audit import audit_history, get_audit_cursor_path, stream_git_lines
+
 # Files and their append-only patterns
 APPEND_ONLY_RULES = {
     '.harness/project-state.yaml': {
@@ -49,29 +51,26 @@ APPEND_ONLY_RULES = {
 }
 
 
-def get_staged_diff(file_path: str) -> str:
-    """Get the staged diff for a file."""
-    try:
-        result = subprocess.run(
-            ['git', 'diff', '--cached', '--', file_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError:
-        return ""
+# Patterns compiled once, for scanning diffs line by line
+DELETION_PATTERNS = {
+    file_path: re.compile(rules['pattern']) for file_path, rules in APPEND_ONLY_RULES.items()
+}
+
+
+def stream_staged_diff(file_path: str):
+    """Yield the staged diff for a file line by line, as git produces it."""
+    return stream_git_lines(['diff', '--cached', '-U0', '--', file_path])
 
 
-def get_deletions_from_diff(diff: str, pattern: str) -> list[str]:
-    """Extract deleted lines matching pattern from diff."""
+def get_deletions_from_diff(lines, pattern: re.Pattern) -> list[str]:
+    """Extract deleted lines matching pattern from diff lines."""
     deletions = []
-    for line in diff.split('\n'):
+    for line in lines:
         # Lines starting with - (but not ---) are deletions
         if line.startswith('-') and not line.startswith('---'):
             # Remove the leading -
             content = line[1:]
-            if re.search(pattern, content):
+            if pattern.search(content):
                 deletions.append(content.strip())
     return deletions
 
@@ -81,11 +80,7 @@ def check_staged_changes() -> tuple[bool, list[str]]:
     violations = []
 
     for file_path, rules in APPEND_ONLY_RULES.items():
-        diff = get_staged_diff(file_path)
-        if not diff:
-            continue
-
-        deletions = get_deletions_from_diff(diff, rules['pattern'])
+        deletions = get_deletions_from_diff(stream_staged_diff(file_path), DELETION_PATTERNS[file_path])
 
         # Filter out DONE/OBSOLETE markers (these are allowed)
         real_deletions = [
@@ -102,33 +97,33 @@ def check_staged_changes() -> tuple[bool, list[str]]:
 
 
 def audit_git_history() -> dict[str, list[str]]:
-    """Audit full git history for all deletions."""
+    """Audit git history for all deletions, reusing verdicts of commits audited before."""
     all_deletions = {}
 
-    for file_path, rules in APPEND_ONLY_RULES.items():
-        try:
-            result = subprocess.run(
-                ['git', 'log', '-p', '--all', '--', file_path],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            deletions = get_deletions_from_diff(result.stdout, rules['pattern'])
-
-            # Filter out DONE/OBSOLETE
-            real_deletions = [
-                d for d in deletions
-                if 'DONE:' not in d and 'OBSOLETE:' not in d
-            ]
-
-            if real_deletions:
-                all_deletions[file_path] = list(set(real_deletions))  # Dedupe
-
-        except subprocess.CalledProcessError:
-            continue
+    def scan(file_path, lines):
+        if file_path not in DELETION_PATTERNS:
+            return []
+        deletions = get_deletions_from_diff(lines, DELETION_PATTERNS[file_path])
+        # Filter out DONE/OBSOLETE
+        return [
+            (file_path, d) for d in deletions
+            if 'DONE:' not in d and 'OBSOLETE:' not in d
+        ]
 
-    return all_deletions
+    history = audit_history(
+        list(APPEND_ONLY_RULES),
+        scan,
+        repr(APPEND_ONLY_RULES),
+        get_audit_cursor_path(get_cache_dir(), 'append-only'),
+    )
+    for _, verdict in history:
+        for file_path, deletion in verdict:
+            all_deletions.setdefault(file_path, set()).add(deletion)  # Dedupe
+
+    return {
+        file_path: list(all_deletions[file_path])
+        for file_path in APPEND_ONLY_RULES if file_path in all_deletions
+    }
 
 
 def main():
@@ -7,27 +7,62 @@ This is core infrastructure for Harness - files ARE the memory.
 
 Usage:
     python3 validate-integrity.py              # Check staged changes (pre-commit)
-    python3 validate-integrity.py --audit      # Audit full git history
+    python3 validate-integrity.py --audit      # Audit git history (new commits only)
+    python3 validate-integrity.py --audit --jobs N  # ... scanning in N processes
     python3 validate-integrity.py --check      # Check protected files exist
     python3 validate-integrity.py --full       # Run all checks
     python3 validate-integrity.py --realtime FILE  # Real-time check for PostToolUse hook
+    python3 validate-integrity.py --serve      # Resident server for the PostToolUse hook (optional)
 
 See Decision #16, #17 in decision-log.md for rationale.
 """
 
 import subprocess
 import sys
+import os
+import io
 import re
+import json
+import signal
+import socket
+import hashlib
 import fnmatch
+import functools
+import contextlib
+import importlib.util
+import itertools
+import socketserver
 from pathlib import Path
 from typing import Optional
 
-# Try to import yaml, fall back to basic parsing if not available
-try:
-    import yaml
-    HAS_YAML = True
-except ImportError:
-    HAS_YAML = False
+from config_cache import load_cached, get_cache_dir
+from history_audit import audit_history, get_audit_cursor_path, stream_git_lines
+
+# yaml is only imported on a config cache miss; fall back to basic parsing if not available
+HAS_YAML = importlib.util.find_spec('yaml') is not None
+
+# Bump when parse_config()'s output changes shape
+CONFIG_CACHE_VERSION = 1
+
+# Reported deletions per append-only rule: section/pattern rules, whole files
+SHOWN_RULE_DELETIONS = 10
+SHOWN_FILE_DELETIONS = 5
+
+# Content type markers and the file each belongs in (D17)
+CONTENT_MARKERS = {
+    'decisions': (re.compile(r'## Decision #\d+'), '.harness/decision-log.md'),
+    'lessons': (re.compile(r'## Lesson #\d+'), '.harness/lessons-learned.md'),
+    'tasks': (re.compile(r'"P[0-2]:'), '.harness/project-state.yaml'),
+}
+
+# Staged files covered by any rule, listed once per process
+_staged_files = None
+
+# (config, its compiled append-only rules), recompiled when the config is reloaded
+_compiled_rules = None
+
+# Index file path -> (stamp, content), re-read when the file changes
+_index_files = {}
 
 
 def find_project_root() -> Path:
@@ -49,106 +84,262 @@ def load_config(project_root: Path) -> dict:
         print("Document integrity cannot be validated without document-controls.yaml")
         sys.exit(1)
 
-    with open(config_path, 'r') as f:
-        content = f.read()
-
     if HAS_YAML:
-        return yaml.safe_load(content)
+        return load_cached(config_path, parse_config, CONFIG_CACHE_VERSION, get_cache_dir(project_root))
     else:
         # Basic fallback - just check if file exists
         print("WARNING: PyYAML not installed. Using basic validation only.")
-        return {'append_only': {}, 'immutable': {}, 'protected': [], 'free': []}
+        return {'append_only': {}, 'immutable': {}, 'segmented': {}, 'protected': [], 'free': []}
 
 
-def get_staged_diff(file_path: str) -> str:
-    """Get the staged diff for a file."""
-    try:
-        result = subprocess.run(
-            ['git', 'diff', '--cached', '--', file_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError:
-        return ""
+def parse_config(content: str) -> dict:
+    """Parse document-controls.yaml content (config cache miss)."""
+    import yaml
+    return yaml.safe_load(content)
 
 
-def get_full_diff(file_path: str) -> str:
-    """Get the full git history diff for a file."""
+def controlled_paths(config: dict) -> list[str]:
+    """Every file path or glob that a staged-change rule applies to."""
+    paths = list(config.get('append_only', {})) + list(config.get('immutable', {}))
+    for manifest_path, rules in config.get('segmented', {}).items():
+        paths.append(manifest_path)
+        if isinstance(rules, dict) and rules.get('segments'):
+            paths.append(rules['segments'])
+    return paths
+
+
+def diff_path(header: str) -> str:
+    """File path from a `git diff --no-renames` header line ("diff --git a/<path> b/<path>")."""
+    names = header.rstrip('\n')[len('diff --git a/'):]
+    return names[:(len(names) - 3) // 2]
+
+
+def get_staged_files(config: dict) -> list[str]:
+    """Get the staged files covered by any rule.
+
+    One `git diff --cached --name-only` covers every path and glob in the
+    config, and the result is shared by all rule checks in the process.
+    Only the append-only check reads actual diffs.
+    """
+    global _staged_files
+    if _staged_files is None:
+        paths = controlled_paths(config)
+        try:
+            result = subprocess.run(
+                ['git', 'diff', '--cached', '--name-only', '-z', '--no-renames', '--', *paths],
+                capture_output=True,
+                text=True,
+                check=True
+            ) if paths else None
+            _staged_files = [name for name in result.stdout.split('\0') if name] if result else []
+        except subprocess.CalledProcessError:
+            _staged_files = []
+    return _staged_files
+
+
+def is_staged(config: dict, file_pattern: str) -> bool:
+    """Whether a file, or any file matching a glob, has staged changes."""
+    staged = get_staged_files(config)
+    if '*' in file_pattern:
+        return any(fnmatch.fnmatch(path, file_pattern) for path in staged)
+    return file_pattern in staged
+
+
+def git_show_all(specs: list[str]) -> dict[str, Optional[str]]:
+    """Get file contents from git in one call, for specs like 'HEAD:path' (committed)
+    or ':path' (staged). Missing files map to None."""
+    contents = dict.fromkeys(specs)
+    if not specs:
+        return contents
     try:
         result = subprocess.run(
-            ['git', 'log', '-p', '--all', '--', file_path],
+            ['git', 'cat-file', '--batch'],
+            input=''.join(f"{spec}\n" for spec in specs).encode(),
             capture_output=True,
-            text=True,
             check=True
         )
-        return result.stdout
     except subprocess.CalledProcessError:
-        return ""
+        return contents
+
+    # Each answer is "<oid> <type> <size>\n<content>\n", or "<spec> missing\n"
+    output = result.stdout
+    pos = 0
+    for spec in specs:
+        end = output.index(b'\n', pos)
+        header = output[pos:end].split(b' ')
+        pos = end + 1
+        if len(header) == 3 and header[2].isdigit():
+            size = int(header[2])
+            contents[spec] = output[pos:pos + size].decode('utf-8', errors='replace')
+            pos += size + 1
+    return contents
+
+
+def parse_manifest(text: Optional[str]) -> list[dict]:
+    """Segment entries from a segment manifest's text ([] if missing or unreadable)."""
+    if not text:
+        return []
+    try:
+        return json.loads(text).get('segments', [])
+    except (ValueError, AttributeError):
+        return []
 
 
-def get_deletions_from_diff(diff: str, pattern: str, status_prefixes: list[str]) -> list[str]:
-    """Extract deleted lines matching pattern from diff, excluding status changes."""
-    deletions = []
-    for line in diff.split('\n'):
-        # Lines starting with - (but not ---) are deletions
-        if line.startswith('-') and not line.startswith('---'):
-            content = line[1:].strip()
-            if re.search(pattern, content):
-                # Check if this is a status change (allowed)
-                is_status_change = any(prefix in content for prefix in status_prefixes)
-                if not is_status_change:
-                    deletions.append(content)
-    return deletions
+def segment_file(manifest_path: str, entry: dict) -> str:
+    """Project-relative path of a manifest entry's segment file."""
+    return os.path.normpath(os.path.join(os.path.dirname(manifest_path), entry['file']))
 
 
-def check_append_only(config: dict, project_root: Path, audit: bool = False) -> tuple[bool, list[str]]:
-    """Check append-only rules."""
-    violations = []
-    status_prefixes = config.get('status_prefixes', [])
-    append_only = config.get('append_only', {})
+def compile_append_only_rules(config: dict) -> tuple[dict, Optional[re.Pattern]]:
+    """Compile the append-only rules once for scanning diffs.
 
-    for file_path, rules in append_only.items():
+    Returns ({file: [(section, pattern, shown, more)]}, status matcher),
+    where shown is how many deletions the report lists and more whether it
+    counts the rest. The status matcher finds any status prefix (None if
+    there are none).
+    """
+    rules_by_file = {}
+    for file_path, rules in config.get('append_only', {}).items():
         if isinstance(rules, dict):
             # File has sections or direct pattern
             if 'sections' in rules:
-                for section_name, section_rules in rules['sections'].items():
-                    pattern = section_rules.get('pattern', '.*')
-                    diff = get_full_diff(file_path) if audit else get_staged_diff(file_path)
-                    if diff:
-                        deletions = get_deletions_from_diff(diff, pattern, status_prefixes)
-                        if deletions:
-                            violations.append(f"\n[APPEND-ONLY VIOLATION] {file_path} ({section_name}):")
-                            for d in deletions[:10]:  # Limit output
-                                violations.append(f"  - {d[:80]}...")
-                            if len(deletions) > 10:
-                                violations.append(f"  ... and {len(deletions) - 10} more")
+                rules_by_file[file_path] = [
+                    (section_name, re.compile(section_rules.get('pattern', '.*')), SHOWN_RULE_DELETIONS, True)
+                    for section_name, section_rules in rules['sections'].items()
+                ]
             elif 'pattern' in rules:
-                pattern = rules['pattern']
-                diff = get_full_diff(file_path) if audit else get_staged_diff(file_path)
-                if diff:
-                    deletions = get_deletions_from_diff(diff, pattern, status_prefixes)
-                    if deletions:
-                        violations.append(f"\n[APPEND-ONLY VIOLATION] {file_path}:")
-                        for d in deletions[:10]:
-                            violations.append(f"  - {d[:80]}...")
-                        if len(deletions) > 10:
-                            violations.append(f"  ... and {len(deletions) - 10} more")
+                rules_by_file[file_path] = [(None, re.compile(rules['pattern']), SHOWN_RULE_DELETIONS, True)]
         else:
-            # Simple true/false - protect entire file
-            diff = get_full_diff(file_path) if audit else get_staged_diff(file_path)
-            if diff:
-                # Any deletion is a violation
-                deletions = [l[1:].strip() for l in diff.split('\n')
-                            if l.startswith('-') and not l.startswith('---') and l[1:].strip()]
-                # Filter out status changes
-                real_deletions = [d for d in deletions
-                                 if not any(prefix in d for prefix in status_prefixes)]
-                if real_deletions:
-                    violations.append(f"\n[APPEND-ONLY VIOLATION] {file_path}:")
-                    for d in real_deletions[:5]:
-                        violations.append(f"  - {d[:80]}...")
+            # Simple true/false - protect entire file, so any non-blank deletion counts
+            rules_by_file[file_path] = [(None, re.compile(r'\S'), SHOWN_FILE_DELETIONS, False)]
+
+    status_prefixes = config.get('status_prefixes', [])
+    status_matcher = re.compile('|'.join(map(re.escape, status_prefixes))) if status_prefixes else None
+    return rules_by_file, status_matcher
+
+
+def get_compiled_rules(config: dict) -> tuple[dict, Optional[re.Pattern]]:
+    """compile_append_only_rules(config), compiled once per loaded config."""
+    global _compiled_rules
+    if _compiled_rules is None or _compiled_rules[0] is not config:
+        _compiled_rules = (config, compile_append_only_rules(config))
+    return _compiled_rules[1]
+
+
+def iter_deletions(lines, status_matcher: Optional[re.Pattern]):
+    """Yield the content of each deleted diff line, skipping status changes (allowed)."""
+    for line in lines:
+        # Lines starting with - (but not ---) are deletions
+        if line.startswith('-') and not line.startswith('---'):
+            content = line[1:].strip()
+            if status_matcher is None or not status_matcher.search(content):
+                yield content
+
+
+def iter_append_only_deletions(compiled: tuple, lines):
+    """Yield (file, section, deleted line) for each deletion in diff lines that breaks
+    an append-only rule. Lines are routed to their file's rules by diff headers."""
+    rules_by_file, status_matcher = compiled
+    file_path = None
+    rules = ()
+    for line in lines:
+        if line.startswith('diff --git a/'):
+            file_path = diff_path(line)
+            rules = rules_by_file.get(file_path, ())
+        elif rules and line.startswith('-') and not line.startswith('---'):
+            content = line[1:].strip()
+            if status_matcher is not None and status_matcher.search(content):
+                continue
+            for section_name, pattern, _, _ in rules:
+                if pattern.search(content):
+                    yield file_path, section_name, content
+
+
+def find_append_only_deletions(compiled: tuple, file_path: str, lines: list[str]) -> list[tuple[str, Optional[str], str]]:
+    """(file, section, deleted line) for each deletion in one file's diff lines that breaks its rules."""
+    return list(iter_append_only_deletions(compiled, lines))
+
+
+def find_staged_append_only_deletions(config: dict, compiled: tuple) -> tuple[dict, dict, bool]:
+    """Scan the staged diffs of changed append-only files as git streams them.
+
+    Returns ({rule: deletions shown}, {rule: deletions found}, complete) for
+    rules (file, section). Only the deletions the report shows are kept,
+    and git is stopped as soon as every rule has more than that - complete
+    is then False and the counts are lower bounds.
+    """
+    rules_by_file = compiled[0]
+    files = [file_path for file_path in rules_by_file if is_staged(config, file_path)]
+    shown = {}
+    counts = {}
+    if not files:
+        return shown, counts, True
+
+    limits = {
+        (file_path, section_name): (limit, more)
+        for file_path in files
+        for section_name, _, limit, more in rules_by_file[file_path]
+    }
+    unfilled = set(limits)
+
+    lines = stream_git_lines(['-c', 'core.quotePath=false', 'diff', '--cached', '--no-renames',
+                              '--no-ext-diff', '-U0', '--', *files])
+    try:
+        for file_path, section_name, deletion in iter_append_only_deletions(compiled, lines):
+            rule = (file_path, section_name)
+            counts[rule] = counts.get(rule, 0) + 1
+            limit, more = limits[rule]
+            if counts[rule] <= limit:
+                shown.setdefault(rule, []).append(deletion)
+            # Filled once the report can't change: its shown lines plus "more" if counted
+            if counts[rule] >= limit + more and rule in unfilled:
+                unfilled.discard(rule)
+                if not unfilled:
+                    return shown, counts, False
+    finally:
+        lines.close()
+    return shown, counts, True
+
+
+def check_append_only(config: dict, project_root: Path, audit: bool = False, jobs: int = 1) -> tuple[bool, list[str]]:
+    """Check append-only rules against staged changes, or every commit when auditing (in jobs processes)."""
+    violations = []
+    append_only = config.get('append_only', {})
+    compiled = get_compiled_rules(config)
+
+    if audit:
+        # Commits audited before keep their verdicts; only new ones are scanned
+        rules_key = repr((append_only, config.get('status_prefixes', [])))
+        history = audit_history(
+            list(append_only),
+            functools.partial(find_append_only_deletions, compiled),
+            rules_key,
+            get_audit_cursor_path(get_cache_dir(project_root), 'integrity'),
+            jobs=jobs,
+        )
+        shown = {}
+        for _, verdict in history:
+            for file_path, section_name, deletion in verdict:
+                shown.setdefault((file_path, section_name), []).append(deletion)
+        counts = {rule: len(deletions) for rule, deletions in shown.items()}
+        complete = True
+    else:
+        shown, counts, complete = find_staged_append_only_deletions(config, compiled)
+
+    # Report rule by rule, in config order
+    for file_path, rules in compiled[0].items():
+        for section_name, _, limit, more in rules:
+            rule = (file_path, section_name)
+            if not counts.get(rule):
+                continue
+            heading = file_path if section_name is None else f"{file_path} ({section_name})"
+            violations.append(f"\n[APPEND-ONLY VIOLATION] {heading}:")
+            for d in shown[rule][:limit]:  # Limit output
+                violations.append(f"  - {d[:80]}...")
+            hidden = counts[rule] - limit
+            if more and hidden > 0:
+                # An early-stopped scan only knows a lower bound
+                violations.append(f"  ... and {hidden} more" if complete else f"  ... and at least {hidden} more")
 
     return len(violations) == 0, violations
 
@@ -159,14 +350,8 @@ def check_immutable(config: dict, project_root: Path) -> tuple[bool, list[str]]:
     immutable = config.get('immutable', {})
 
     for file_pattern, rules in immutable.items():
-        # Handle glob patterns
-        if '*' in file_pattern:
-            # For now, just check if any matching files are being modified
-            diff = get_staged_diff(file_pattern)
-        else:
-            diff = get_staged_diff(file_pattern)
-
-        if diff:
+        # Glob patterns match any staged file they cover
+        if is_staged(config, file_pattern):
             violations.append(f"\n[IMMUTABLE VIOLATION] {file_pattern}:")
             violations.append(f"  This file cannot be modified. It is marked as immutable.")
             violations.append(f"  To append new entries, use a different approach (e.g., new atoms).")
@@ -174,6 +359,59 @@ def check_immutable(config: dict, project_root: Path) -> tuple[bool, list[str]]:
     return len(violations) == 0, violations
 
 
+def check_sealed_segments(config: dict, project_root: Path) -> tuple[bool, list[str]]:
+    """Check segmented stores - sealed segments and their manifest entries cannot change."""
+    violations = []
+
+    manifest_paths = list(config.get('segmented', {}))
+    manifests = git_show_all([f'{prefix}:{path}' for path in manifest_paths for prefix in ('HEAD', '')])
+
+    for manifest_path in manifest_paths:
+        committed = parse_manifest(manifests[f'HEAD:{manifest_path}'])
+        if not any(entry.get('sealed') for entry in committed):
+            continue
+        staged = parse_manifest(manifests[f':{manifest_path}'])
+
+        for ordinal, entry in enumerate(committed):
+            if not entry.get('sealed'):
+                continue
+            segment = segment_file(manifest_path, entry)
+            if ordinal >= len(staged) or staged[ordinal] != entry:
+                violations.append(f"\n[SEALED SEGMENT VIOLATION] {manifest_path}:")
+                violations.append(f"  The entry for sealed segment {segment} was changed or removed.")
+            if is_staged(config, segment):
+                violations.append(f"\n[SEALED SEGMENT VIOLATION] {segment}:")
+                violations.append(f"  Sealed segments cannot be modified. New atoms go in a new segment.")
+
+    return len(violations) == 0, violations
+
+
+def check_segment_checksums(config: dict, project_root: Path) -> tuple[bool, list[str]]:
+    """Check that sealed segments exist and match their manifest checksums."""
+    problems = []
+
+    for manifest_path in config.get('segmented', {}):
+        full_path = project_root / manifest_path
+        if not full_path.exists():
+            continue
+        for entry in parse_manifest(full_path.read_text()):
+            if not entry.get('sealed') or not entry.get('sha256'):
+                continue
+            segment = segment_file(manifest_path, entry)
+            segment_path = project_root / segment
+            if not segment_path.exists():
+                problems.append(f"[MISSING] Sealed segment does not exist: {segment}")
+                continue
+            digest = hashlib.sha256()
+            with open(segment_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != entry['sha256']:
+                problems.append(f"[CHECKSUM MISMATCH] Sealed segment {segment} differs from {manifest_path}")
+
+    return len(problems) == 0, problems
+
+
 def check_protected_exist(config: dict, project_root: Path) -> tuple[bool, list[str]]:
     """Check that protected files exist."""
     warnings = []
@@ -202,6 +440,10 @@ def check_unregistered(config: dict, project_root: Path) -> tuple[bool, list[str
         registered.add(file_path)
     for file_path in config.get('immutable', {}).keys():
         registered.add(file_path)
+    for file_path, rules in config.get('segmented', {}).items():
+        registered.add(file_path)
+        if isinstance(rules, dict) and rules.get('segments'):
+            registered.add(rules['segments'])
     for file_path in config.get('protected', []):
         registered.add(file_path)
     for pattern in config.get('free', []):
@@ -269,14 +511,8 @@ def check_content_location(config: dict, project_root: Path, file_path: str, con
             return True, []
 
     # Check for misplaced content
-    content_markers = {
-        'decisions': (r'## Decision #\d+', '.harness/decision-log.md'),
-        'lessons': (r'## Lesson #\d+', '.harness/lessons-learned.md'),
-        'tasks': (r'"P[0-2]:', '.harness/project-state.yaml'),
-    }
-
-    for content_type, (pattern, expected_file) in content_markers.items():
-        if re.search(pattern, content):
+    for content_type, (pattern, expected_file) in CONTENT_MARKERS.items():
+        if pattern.search(content):
             if file_path != expected_file and not file_path.endswith(expected_file):
                 loc_config = locations.get(content_type, {})
                 expected = loc_config.get('file', expected_file)
@@ -289,6 +525,26 @@ def check_content_location(config: dict, project_root: Path, file_path: str, con
     return len(warnings) == 0, warnings
 
 
+def file_stamp(path: Path) -> Optional[tuple[int, int]]:
+    """(mtime, size) of a file, to notice changes - None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_index_file(index_path: Path) -> str:
+    """Read the registration index, re-reading it only when it has changed."""
+    stamp = file_stamp(index_path)
+    cached = _index_files.get(index_path)
+    if cached is None or cached[0] != stamp:
+        with open(index_path, 'r') as f:
+            cached = (stamp, f.read())
+        _index_files[index_path] = cached
+    return cached[1]
+
+
 def check_registration(config: dict, project_root: Path, file_path: str) -> tuple[bool, list[str]]:
     """
     Check if file is registered in PROJECT-MAP.md (D17).
@@ -326,8 +582,7 @@ def check_registration(config: dict, project_root: Path, file_path: str) -> tupl
         return False, warnings
 
     try:
-        with open(index_path, 'r') as f:
-            index_content = f.read()
+        index_content = read_index_file(index_path)
 
         # Check if file is mentioned (by name or path)
         file_name = Path(file_path).name
@@ -361,25 +616,31 @@ def validate_realtime(config: dict, project_root: Path, file_path: str) -> int:
     if not passed:
         all_warnings.extend(messages)
 
+    # Check sealed segments (edits to them can't be allowed at all)
+    for manifest_path in config.get('segmented', {}):
+        full_path = project_root / manifest_path
+        if not full_path.exists():
+            continue
+        for entry in parse_manifest(full_path.read_text()):
+            if entry.get('sealed') and segment_file(manifest_path, entry) == os.path.normpath(file_path):
+                has_errors = True
+                all_warnings.append(f"[SEALED] {file_path} is a sealed segment of {manifest_path} and cannot change")
+
     # Check append-only (if file is in config)
     append_only = config.get('append_only', {})
     if file_path in append_only or any(file_path.endswith(k) for k in append_only.keys()):
-        # Get unstaged diff for this file
+        # Stream the unstaged diff for this file, stopping at the deletions shown
         try:
-            result = subprocess.run(
-                ['git', 'diff', '--', file_path],
-                capture_output=True,
-                text=True,
-                cwd=project_root
-            )
-            if result.stdout:
-                status_prefixes = config.get('status_prefixes', [])
-                deletions = get_deletions_from_diff(result.stdout, '.*', status_prefixes)
-                if deletions:
-                    has_errors = True
-                    all_warnings.append(f"[APPEND-ONLY] Deletions detected in {file_path}")
-                    for d in deletions[:3]:
-                        all_warnings.append(f"  - {d[:60]}...")
+            lines = stream_git_lines(['diff', '-U0', '--', file_path], cwd=project_root)
+            try:
+                deletions = list(itertools.islice(iter_deletions(lines, get_compiled_rules(config)[1]), 3))
+            finally:
+                lines.close()
+            if deletions:
+                has_errors = True
+                all_warnings.append(f"[APPEND-ONLY] Deletions detected in {file_path}")
+                for d in deletions:
+                    all_warnings.append(f"  - {d[:60]}...")
         except:
             pass
 
@@ -394,6 +655,97 @@ def validate_realtime(config: dict, project_root: Path, file_path: str) -> int:
     return 0
 
 
+# The server wakes at least this often to check whether its code changed
+SERVE_POLL_SECONDS = 5
+
+# Modules the server runs besides this script; it stops when any of them changes
+SERVE_MODULES = ('config_cache.py', 'history_audit.py')
+
+
+def get_socket_path(project_root: Path) -> Path:
+    """Get path to the realtime validation server's Unix socket."""
+    return get_cache_dir(project_root) / 'validate.sock'
+
+
+def serve(project_root: Path) -> int:
+    """
+    Run the realtime validation server for the PostToolUse hook (D17).
+
+    Each connection sends a project-relative file path on one line and gets
+    back validate_realtime()'s exit code on the first line, then its output.
+    The config, compiled rules and registration index stay in memory and are
+    reloaded when their files change. The server stops within
+    SERVE_POLL_SECONDS once this script or a module it uses changes, so it
+    never validates with stale code; until it is restarted the hook runs
+    --realtime itself, as it does for any request the server can't answer.
+    """
+    socket_path = get_socket_path(project_root)
+    config_path = project_root / '.harness' / 'document-controls.yaml'
+    script_path = Path(__file__).resolve()
+    code_paths = [script_path, *(script_path.with_name(name) for name in SERVE_MODULES)]
+
+    def code_stamp():
+        return [file_stamp(path) for path in code_paths]
+
+    started_stamp = code_stamp()
+    loaded = {'stamp': None, 'config': None}
+
+    def current_config():
+        stamp = file_stamp(config_path)
+        if stamp != loaded['stamp']:
+            loaded['config'] = load_config(project_root)
+            loaded['stamp'] = stamp
+        return loaded['config']
+
+    class RealtimeHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            file_path = self.rfile.readline().decode('utf-8', errors='replace').strip()
+            if not file_path or code_stamp() != started_stamp:
+                return  # No answer - the hook falls back to --realtime
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    exit_code = validate_realtime(current_config(), project_root, file_path)
+            except SystemExit:
+                return  # load_config() gave up (e.g. no document-controls.yaml)
+            self.wfile.write(f"{exit_code}\n{output.getvalue()}".encode('utf-8'))
+
+    if socket_path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(socket_path))
+            print(f"ERROR: A validation server is already running on {socket_path}")
+            return 1
+        except OSError:
+            socket_path.unlink()  # Left behind by a server that didn't stop cleanly
+        finally:
+            probe.close()
+
+    current_config()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        server = socketserver.UnixStreamServer(str(socket_path), RealtimeHandler)
+    except OSError as e:
+        print(f"ERROR: Cannot listen on {socket_path}: {e}")
+        return 1
+    # handle_request() returns after this long without a connection
+    server.timeout = SERVE_POLL_SECONDS
+
+    # Stop cleanly (removing the socket) on SIGTERM as well as Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Serving realtime validation on {socket_path} (Ctrl-C to stop)")
+    try:
+        while code_stamp() == started_stamp:
+            server.handle_request()
+        print("Validator code changed - stopping (restart with --serve)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+    return 0
+
+
 def main():
     project_root = find_project_root()
     config = load_config(project_root)
@@ -403,6 +755,9 @@ def main():
     full_mode = '--full' in sys.argv
     realtime_mode = '--realtime' in sys.argv
 
+    if '--serve' in sys.argv:
+        return serve(project_root)
+
     # Handle realtime mode (D17 - PostToolUse hook)
     if realtime_mode:
         try:
@@ -417,12 +772,22 @@ def main():
             print("ERROR: --realtime requires a file path")
             return 1
 
+    jobs = 1
+    if '--jobs' in sys.argv:
+        try:
+            jobs = int(sys.argv[sys.argv.index('--jobs') + 1])
+            if jobs < 1:
+                raise ValueError
+        except (IndexError, ValueError):
+            print("ERROR: --jobs requires a number of processes (1 or more)")
+            return 1
+
     all_passed = True
     all_messages = []
 
     # Pre-commit mode (default) or audit mode
     if not check_mode or full_mode:
-        passed, messages = check_append_only(config, project_root, audit=audit_mode)
+        passed, messages = check_append_only(config, project_root, audit=audit_mode, jobs=jobs)
         if not passed:
             all_passed = False
             all_messages.extend(messages)
@@ -432,6 +797,11 @@ def main():
             all_passed = False
             all_messages.extend(messages)
 
+        passed, messages = check_sealed_segments(config, project_root)
+        if not passed:
+            all_passed = False
+            all_messages.extend(messages)
+
         # Always check for unregistered files in pre-commit mode
         if not audit_mode:
             passed, messages = check_unregistered(config, project_root)
@@ -449,6 +819,11 @@ def main():
             all_passed = False
             all_messages.extend(messages)
 
+        passed, messages = check_segment_checksums(config, project_root)
+        if not passed:
+            all_passed = False
+            all_messages.extend(messages)
+
         passed, messages = check_unregistered(config, project_root)
         if not passed:
             # Unregistered is a warning, not a blocker